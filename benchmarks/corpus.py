@@ -0,0 +1,93 @@
+import os
+import random
+import docx
+from src.skill_extractor import get_skill_matcher
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Diego", "Elif", "Farah", "Goran", "Hana", "Ivan", "Jun", "Kofi", "Lena"]
+LAST_NAMES = ["Patel", "Smith", "Wang", "Garcia", "Yilmaz", "Khan", "Novak", "Sato", "Petrov", "Mensah"]
+ROLES = ["Software Engineer", "Data Engineer", "DevOps Engineer", "Backend Developer", "ML Engineer", "QA Engineer"]
+FILLER = (
+    "Delivered features end to end with product and design partners. Improved reliability of "
+    "production services and reduced incident count. Mentored junior engineers and ran code "
+    "reviews. Wrote design documents, estimated work and tracked delivery against milestones."
+)
+LINES_PER_PAGE = 45
+
+
+def _resume_lines(rng, skills):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, rng.choice(ROLES), "", "Skills: " + ", ".join(rng.sample(skills, rng.randint(6, 18))), ""]
+    for job in range(rng.randint(2, 6)):
+        lines.append(f"{rng.choice(ROLES)} at Company {rng.randint(1, 500)} ({2010 + job}-{2011 + job})")
+        for _ in range(rng.randint(3, 8)):
+            lines.append(f"- Built services using {rng.choice(skills)} and {rng.choice(skills)}. {FILLER[:rng.randint(40, 160)]}")
+        lines.append("")
+    return lines
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, lines):
+    """Write a minimal text-only PDF (Helvetica, one content stream per page)."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        text = "\n".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 770 Td\n{text}\nET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, lines):
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def make_corpus(directory, count, formats=("pdf", "docx"), seed=0):
+    """
+    Generate `count` synthetic resumes in `directory`, alternating between `formats`.
+    Files that already exist are kept, so a corpus is only built once.
+
+    Returns:
+        List[str]: Paths of the resumes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    skills = get_skill_matcher().canonical_skills
+    writers = {"pdf": write_pdf, "docx": write_docx}
+    paths = []
+    for i in range(count):
+        ext = formats[i % len(formats)]
+        path = os.path.join(directory, f"resume_{i:05d}.{ext}")
+        if not os.path.exists(path):
+            # Seed per file so every corpus size shares its first files.
+            writers[ext](path, _resume_lines(random.Random(f"{seed}-{i}"), skills))
+        paths.append(path)
+    return paths
+
+
+def make_job_description(seed=0):
+    """Synthetic job description text asking for a handful of taxonomy skills."""
+    rng = random.Random(f"jd-{seed}")
+    skills = rng.sample(get_skill_matcher().canonical_skills, 10)
+    return (f"We are hiring a {rng.choice(ROLES)}. Required skills: {', '.join(skills[:6])}. "
+            f"Nice to have: {', '.join(skills[6:])}. {FILLER}")
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import numpy as np
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from src.bedrock_client import estimate_tokens
+from src.skill_extractor import extract_local_skills
+
+EMBEDDING_DIM = 1536
+
+
+class FakeBedrockClient:
+    """
+    Local stand-in for a bedrock-runtime client, for benchmarks without AWS.
+
+    Serves Claude v2 style completions (the taxonomy skills found in the prompt, as a
+    Python list) and deterministic 1536-dim Titan embeddings, after a simulated
+    network latency. A fraction of calls can be failed with ThrottlingException or
+    ServiceUnavailableException to exercise the retry and rate limiting paths.
+
+    Args:
+        latency: Mean seconds per call; actual latency is lognormal around it.
+        throttle_rate: Fraction of calls rejected with ThrottlingException.
+        error_rate: Fraction of calls failing with ServiceUnavailableException.
+    """
+
+    def __init__(self, latency=0.05, throttle_rate=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _roll(self):
+        with self._lock:
+            self.calls += 1
+            return self._random.random(), self._random.lognormvariate(0, 0.5)
+
+    def _fail(self, code, message):
+        raise ClientError({"Error": {"Code": code, "Message": message},
+                           "ResponseMetadata": {"HTTPStatusCode": 429 if code == "ThrottlingException" else 503}},
+                          "InvokeModel")
+
+    def invoke_model(self, body, modelId, accept="application/json", contentType="application/json"):
+        roll, spread = self._roll()
+        if self.latency:
+            time.sleep(self.latency * spread / 1.13)  # E[lognormal(0, 0.5)] ~= 1.13
+        if roll < self.throttle_rate:
+            self._fail("ThrottlingException", "Too many requests, please wait before trying again.")
+        if roll < self.throttle_rate + self.error_rate:
+            self._fail("ServiceUnavailableException", "Service unavailable (injected).")
+
+        request = json.loads(body)
+        if "inputText" in request:
+            text = request["inputText"]
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            embedding = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM, dtype=np.float32)
+            payload = {"embedding": embedding.tolist(), "inputTextTokenCount": estimate_tokens(text)}
+            input_tokens, output_tokens = payload["inputTextTokenCount"], 0
+        else:
+            prompt = request["prompt"]
+            completion = f" Here are the technical skills: {extract_local_skills(prompt)!r}"
+            payload = {"completion": completion, "stop_reason": "stop_sequence"}
+            input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(completion)
+
+        data = json.dumps(payload).encode("utf-8")
+        return {
+            "body": StreamingBody(io.BytesIO(data), len(data)),
+            "contentType": "application/json",
+            "ResponseMetadata": {
+                "HTTPStatusCode": 200,
+                "HTTPHeaders": {
+                    "x-amzn-bedrock-input-token-count": str(input_tokens),
+                    "x-amzn-bedrock-output-token-count": str(output_tokens),
+                },
+            },
+        }
+
+
+def fake_client_factory(**options):
+    """Client factory for bedrock_client.set_client_factory; all credentials share one fake client."""
+    client = FakeBedrockClient(**options)
+
+    def factory(aws_access_key, aws_secret_key, aws_region, config):
+        return client
+
+    return factory
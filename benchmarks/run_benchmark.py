@@ -0,0 +1,194 @@
+"""
+Offline pipeline benchmark: parse -> skills -> embeddings -> scoring over synthetic
+resume corpora, with Bedrock replaced by a local stand-in (benchmarks/fake_bedrock.py).
+
+    python -m benchmarks.run_benchmark --sizes 10 100 1000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmark --sizes 10 100 1000 --baseline benchmarks/baseline.json
+
+Exits with status 1 when a size regresses against the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The benchmark must never read or clear the real cache; CACHE_PATH is read on import.
+os.environ.setdefault("RESUME_MATCHER_CACHE", os.path.join(tempfile.gettempdir(), "resume_matcher_bench.sqlite3"))
+
+from benchmarks.corpus import make_corpus, make_job_description
+from benchmarks.fake_bedrock import fake_client_factory
+from src.bedrock_client import MODEL_LIMITS, configure_model_limits, set_client_factory
+from src.bedrock_llm import SKILL_MODEL_ID
+from src.cache import get_cache
+from src.embeddings import EMBEDDING_MODEL_ID
+from src.metrics import new_run_metrics
+from src.parser import RESUME_EXTENSIONS, parse_documents, parse_resume
+from src.report import DEFAULT_MAX_CONCURRENCY, DEFAULT_SKILL_MODE, SKILL_MODES, generate_match_report
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "resume_matcher_bench_corpus")
+DEFAULT_TOLERANCE = 0.15
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the matching pipeline against a local Bedrock stand-in.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Corpus sizes to run (e.g. 10 100 1000 10000).")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR,
+                        help="Where synthetic resumes are generated (reused between runs).")
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "docx"], default=["pdf", "docx"])
+    parser.add_argument("--parser", choices=["pool", "serial"], default="pool",
+                        help="pool: parse_documents on a process pool (as the engine does); "
+                             "serial: parse_resume one file at a time.")
+    parser.add_argument("--parse-workers", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--skill-mode", choices=SKILL_MODES, default=DEFAULT_SKILL_MODE)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean simulated Bedrock latency (s).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls throttled.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 503.")
+    parser.add_argument("--respect-quotas", action="store_true",
+                        help="Keep the production MODEL_LIMITS instead of lifting them, so the "
+                             "rate limiter's pacing is part of the measurement.")
+    parser.add_argument("--out", default=None, help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", default=None, help="Compare against a stored results file.")
+    parser.add_argument("--save-baseline", default=None, help="Store these results as a baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown / memory growth before a regression is reported.")
+    return parser.parse_args(argv)
+
+
+def peak_memory_mb():
+    """
+    Peak RSS of this process and of its (finished) parse workers, in MB. Peaks only
+    grow, so sizes are run smallest first. tracemalloc is not used: it slows pdfplumber
+    several-fold and would distort the timings being measured.
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss is in KB on Linux and bytes on macOS.
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return round(own / 2 ** 20, 1), round(children / 2 ** 20, 1)
+
+
+def _percentiles(stats):
+    return {"p50": stats["p50"], "p95": stats["p95"]} if stats else {"p50": None, "p95": None}
+
+
+def run_size(paths, job_text, args):
+    """Run the pipeline over one corpus with a cold cache and return its measurements."""
+    get_cache().clear()
+    metrics = new_run_metrics()
+    start = time.perf_counter()
+
+    if args.parser == "pool":
+        parsed = parse_documents(paths, allowed_ext=RESUME_EXTENSIONS, max_workers=args.parse_workers)
+        for doc in parsed:
+            metrics.observe("document_seconds", doc["duration"], stage="parse")
+        resume_texts = {doc["name"]: doc["text"] for doc in parsed}
+    else:
+        resume_texts = {}
+        for path in paths:
+            with metrics.timer("document_seconds", stage="parse"):
+                resume_texts[os.path.basename(path)] = parse_resume(path)
+    parse_seconds = time.perf_counter() - start
+
+    results = generate_match_report(resume_texts, job_text, "benchmark", "benchmark", "us-east-1",
+                                    max_concurrency=args.concurrency, skill_mode=args.skill_mode)
+    seconds = time.perf_counter() - start
+    peak, workers_peak = peak_memory_mb()
+
+    summary = metrics.summary()
+    bedrock = summary["bedrock"]
+    return {
+        "documents": len(paths),
+        "matched": len(results),
+        "seconds": round(seconds, 3),
+        "parse_seconds": round(parse_seconds, 3),
+        "throughput": round(len(paths) / seconds, 2),
+        "parse_latency": _percentiles(summary["documents"].get("parse")),
+        "analyse_latency": _percentiles(summary["documents"].get("analyse")),
+        "bedrock_calls": sum(model.get("calls", 0) for model in bedrock.values()),
+        "bedrock_retries": sum(model.get("retries", 0) for model in bedrock.values()),
+        "peak_memory_mb": peak,
+        "parse_workers_peak_memory_mb": workers_peak,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for every size present in both runs."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            continue
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{size}: throughput {current['throughput']}/s < baseline {previous['throughput']}/s")
+        for field in ("parse_latency", "analyse_latency"):
+            now, then = current[field]["p95"], previous[field]["p95"]
+            if now is not None and then and now > then * (1 + tolerance):
+                regressions.append(f"{size}: {field} p95 {now}s > baseline {then}s")
+        if current["peak_memory_mb"] and previous["peak_memory_mb"] and \
+                current["peak_memory_mb"] > previous["peak_memory_mb"] * (1 + tolerance):
+            regressions.append(f"{size}: peak memory {current['peak_memory_mb']} MB > "
+                               f"baseline {previous['peak_memory_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_client_factory(fake_client_factory(latency=args.latency, throttle_rate=args.throttle_rate,
+                                           error_rate=args.error_rate))
+    if not args.respect_quotas:
+        for model_id in (SKILL_MODEL_ID, EMBEDDING_MODEL_ID):
+            configure_model_limits(model_id, requests_per_second=1e6, tokens_per_minute=1e9)
+
+    results = {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("out", "baseline", "save_baseline", "corpus_dir")},
+        "model_limits": {model_id: MODEL_LIMITS.get(model_id) for model_id in (SKILL_MODEL_ID, EMBEDDING_MODEL_ID)},
+        "sizes": {},
+    }
+    job_text = make_job_description()
+    for size in sorted(args.sizes):
+        paths = make_corpus(args.corpus_dir, size, tuple(args.formats))
+        result = run_size(paths, job_text, args)
+        results["sizes"][str(size)] = result
+        print(f"📊 {size:>6} resumes: {result['seconds']:>8.2f}s  {result['throughput']:>8.2f} resumes/s  "
+              f"parse p50/p95 {result['parse_latency']['p50']}/{result['parse_latency']['p95']}s  "
+              f"analyse p50/p95 {result['analyse_latency']['p50']}/{result['analyse_latency']['p95']}s  "
+              f"calls {result['bedrock_calls']} (+{result['bedrock_retries']} retries)  "
+              f"peak {result['peak_memory_mb']} MB")
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"📄 {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print("⚠️ Baseline was recorded with different settings; comparison may not be meaningful.")
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"❌ Regression {message}")
+        if regressions:
+            return 1
+        print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Startup and rerun latency budget.
+
+    python -m benchmarks.startup_budget
+    python -m benchmarks.startup_budget --scale 2   # on a slower machine
+
+Checks that the modules loaded by the UI, the CLI and job workers import within
+IMPORT_BUDGETS (each measured in a fresh interpreter, best of --repeat) without pulling
+in any of HEAVY_MODULES, and that ui.py stays within UI_BUDGETS for its first run and
+for a rerun after a widget change (Streamlit re-executes the whole script on every
+interaction). Exits with status 1 when a budget is exceeded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds, on the machine the budget was set on.
+IMPORT_BUDGETS = {
+    "src.engine": 0.4,
+    "src.jobs": 0.4,
+    "cli": 0.4,
+}
+# AppTest timings include its own polling (~0.05s per run).
+UI_BUDGETS = {
+    "first_run": 1.5,
+    "rerun": 0.5,
+}
+# Only imported where they are used: document parsing, Bedrock clients, tables and the result store.
+HEAVY_MODULES = ("pandas", "pyarrow", "boto3", "botocore.config", "pdfplumber", "docx", "sklearn")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check import time and Streamlit rerun latency budgets.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per import measurement.")
+    parser.add_argument("--reruns", type=int, default=5, help="UI reruns measured after the first run.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, for slower machines.")
+    parser.add_argument("--skip-ui", action="store_true", help="Only check imports.")
+    return parser.parse_args(argv)
+
+
+def measure_import(module, repeat):
+    """Best import time of `module` over `repeat` fresh interpreters, and the heavy modules it loaded."""
+    timings, heavy = [], []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy = result["heavy"]
+    return min(timings), heavy
+
+
+def measure_ui(reruns):
+    """First run and median rerun of ui.py under AppTest, in seconds."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(PROJECT_ROOT, "ui.py"), default_timeout=60)
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"ui.py raised: {app.exception[0].value}")
+
+    timings = []
+    score = app.sidebar.number_input[0]
+    for _ in range(reruns):
+        start = time.perf_counter()
+        score.set_value(score.value % 100 + 1).run()
+        timings.append(time.perf_counter() - start)
+    return first_run, statistics.median(timings)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failures = []
+
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds, heavy = measure_import(module, args.repeat)
+        budget *= args.scale
+        print(f"{'✅' if seconds <= budget else '❌'} import {module:<12} {seconds:.3f}s (budget {budget:.2f}s)")
+        if seconds > budget:
+            failures.append(f"import {module} took {seconds:.3f}s")
+        if heavy:
+            print(f"❌ import {module} loads {', '.join(heavy)}")
+            failures.append(f"import {module} loads {', '.join(heavy)}")
+
+    if not args.skip_ui:
+        # Keep the UI's job folder, cache and uploads out of the working tree.
+        workdir = tempfile.mkdtemp(prefix="resume_matcher_budget_")
+        os.environ.setdefault("RESUME_MATCHER_JOBS_FOLDER", os.path.join(workdir, "jobs"))
+        os.environ.setdefault("RESUME_MATCHER_CACHE", os.path.join(workdir, "cache.sqlite3"))
+        os.chdir(workdir)
+        sys.path.insert(0, PROJECT_ROOT)
+        first_run, rerun = measure_ui(args.reruns)
+        for name, seconds in (("first_run", first_run), ("rerun", rerun)):
+            budget = UI_BUDGETS[name] * args.scale
+            print(f"{'✅' if seconds <= budget else '❌'} ui.py {name:<10} {seconds:.3f}s (budget {budget:.2f}s)")
+            if seconds > budget:
+                failures.append(f"ui.py {name} took {seconds:.3f}s")
+
+    if failures:
+        print(f"❌ {len(failures)} budget(s) exceeded")
+        return 1
+    print("✅ Startup and rerun latency within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# cli.py
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+from src.engine import (
+    DEFAULT_MIN_MATCH_SCORE, collect_sources, export_selected, run_matching, write_reports
+)
+from src.metrics import get_metrics
+from src.parser import DOCUMENT_EXTENSIONS, RESUME_EXTENSIONS
+from src.report import DEFAULT_MAX_CONCURRENCY, DEFAULT_SKILL_MODE, SKILL_MODES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Match resumes against job descriptions without the Streamlit UI."
+    )
+    parser.add_argument("--jd", required=True, help="Job description file, directory or ZIP.")
+    parser.add_argument("--resumes", required=True, help="Resume file, directory or ZIP.")
+    parser.add_argument("--out", default="reports", help="Output directory for reports (default: reports).")
+    parser.add_argument("--format", nargs="+", choices=["csv", "json", "parquet"], default=["csv", "json"],
+                        help="Report formats to write.")
+    parser.add_argument("--min-score", type=float, default=DEFAULT_MIN_MATCH_SCORE,
+                        help="Minimum resume match score (%%) for a resume to be selected.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Max concurrent Bedrock requests.")
+    parser.add_argument("--skill-mode", choices=SKILL_MODES, default=DEFAULT_SKILL_MODE,
+                        help="Skill extraction: llm (Claude), local (taxonomy, no Bedrock call) or "
+                             "hybrid (local first, Claude for low-coverage documents).")
+    parser.add_argument("--two-stage", action="store_true",
+                        help="Rank on embeddings + local skills first and run --skill-mode extraction only "
+                             "on resumes scoring at least --min-score.")
+    parser.add_argument("--shortlist-top-n", type=int, default=None,
+                        help="With --two-stage, fully analyse at most this many resumes per JD.")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Analyse duplicate resumes separately instead of once per duplicate group.")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Parser processes (default: CPU count).")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file; defaults to <out>/checkpoint.jsonl. Rerun with the same "
+                             "file to resume an interrupted run.")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Disable checkpointing.")
+    parser.add_argument("--copy-selected", action="store_true",
+                        help="Copy selected resumes into <out>/selected_profile/<jd>/.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+    aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
+    aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+    aws_region = os.getenv("AWS_REGION", "us-east-1")
+    if not (aws_access_key and aws_secret_key):
+        print("❌ Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY (environment or .env).", file=sys.stderr)
+        return 2
+
+    jd_sources = collect_sources(args.jd, DOCUMENT_EXTENSIONS)
+    resume_sources = collect_sources(args.resumes, RESUME_EXTENSIONS)
+    if not jd_sources or not resume_sources:
+        print("❌ No job descriptions or no resumes found.", file=sys.stderr)
+        return 2
+
+    checkpoint = None if args.no_checkpoint else (args.checkpoint or os.path.join(args.out, "checkpoint.jsonl"))
+    run = run_matching(
+        jd_sources, resume_sources, aws_access_key, aws_secret_key, aws_region,
+        max_concurrency=args.concurrency, min_match_score=args.min_score,
+        checkpoint_path=checkpoint, parse_workers=args.parse_workers, skill_mode=args.skill_mode,
+        two_stage=args.two_stage, shortlist_top_n=args.shortlist_top_n, deduplicate=not args.no_dedup
+    )
+
+    for path in write_reports(run, args.out, args.format):
+        print(f"📄 {path}")
+    if args.copy_selected:
+        copied = export_selected(run, resume_sources, os.path.join(args.out, "selected_profile"))
+        print(f"📁 Copied {copied} selected resumes")
+    for path in get_metrics().write(args.out):
+        print(f"📈 {path}")
+    for jd_name, names in run["selected"].items():
+        print(f"✅ {jd_name}: {len(names)}/{len(run['reports'][jd_name])} resumes selected")
+    summary = get_metrics().summary()
+    tokens = summary["tokens"]
+    if tokens:
+        print(f"✂️ Preprocessing saved ~{tokens['tokens_saved']} of {2 * tokens['original_tokens']} "
+              f"estimated model input tokens")
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in summary["stages"].items())
+    print(f"⏱️ Finished in {run['duration']}s ({stages})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import json
+import random
+import threading
+import time
+import botocore.exceptions
+from src.logger import logger
+from src.metrics import get_metrics
+from src.rate_limit import AdaptiveConcurrencyLimiter, CircuitBreaker, TokenBucket
+
+# Tunables for the shared bedrock-runtime clients. max_pool_connections should be
+# at least the number of concurrent Bedrock requests (see report.DEFAULT_MAX_CONCURRENCY).
+# botocore's own retries are off: invoke_model() below retries with knowledge of the
+# other in-flight calls.
+CLIENT_SETTINGS = {
+    "max_pool_connections": 32,
+    "connect_timeout": 5,
+    "read_timeout": 60,
+    "retry_mode": "standard",
+    "max_attempts": 0,
+}
+
+# Per-model quotas enforced process-wide. Set these to the account's Bedrock quotas with
+# configure_model_limits(); models not listed use "default".
+MODEL_LIMITS = {
+    "anthropic.claude-v2": {"requests_per_second": 5, "tokens_per_minute": 200000, "max_concurrency": 32},
+    "amazon.titan-embed-text-v1": {"requests_per_second": 30, "tokens_per_minute": 300000, "max_concurrency": 32},
+    "default": {"requests_per_second": 10, "tokens_per_minute": 200000, "max_concurrency": 32},
+}
+
+RETRY_SETTINGS = {
+    "max_retries": 4,
+    "base_delay": 0.5,
+    "max_delay": 20.0,
+    "breaker_failures": 5,
+    "breaker_reset": 30.0,
+}
+
+THROTTLING_ERRORS = {"ThrottlingException", "TooManyRequestsException"}
+RETRYABLE_ERRORS = THROTTLING_ERRORS | {
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "RequestTimeout",
+    "RequestTimeoutException",
+}
+_CONNECTION_ERRORS = (
+    botocore.exceptions.ConnectionError,
+    botocore.exceptions.ReadTimeoutError,
+    botocore.exceptions.ConnectionClosedError,
+)
+
+_clients = {}
+_lock = threading.Lock()
+_model_guards = {}
+_client_factory = None
+
+
+def configure_bedrock_client(**settings):
+    """
+    Update the botocore settings used for new clients and drop existing ones
+    so the next call picks the new configuration up.
+    """
+    unknown = set(settings) - set(CLIENT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown Bedrock client setting(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        CLIENT_SETTINGS.update(settings)
+        _clients.clear()
+
+
+def _build_config():
+    # boto3 and botocore.config are imported when the first client is built, not at
+    # import time: they are the bulk of this module's import cost.
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=CLIENT_SETTINGS["max_pool_connections"],
+        connect_timeout=CLIENT_SETTINGS["connect_timeout"],
+        read_timeout=CLIENT_SETTINGS["read_timeout"],
+        retries={
+            "mode": CLIENT_SETTINGS["retry_mode"],
+            "max_attempts": CLIENT_SETTINGS["max_attempts"],
+        },
+    )
+
+
+def set_client_factory(factory=None):
+    """
+    Build bedrock-runtime clients with `factory(aws_access_key, aws_secret_key, aws_region, config)`
+    instead of boto3, e.g. a local stand-in for offline benchmarks. None restores boto3.
+    """
+    global _client_factory
+    with _lock:
+        _client_factory = factory
+        _clients.clear()
+
+
+def get_bedrock_client(aws_access_key, aws_secret_key, aws_region):
+    """
+    Return the shared bedrock-runtime client for a credential set.
+
+    One client is created per (access key, region) and reused by every caller;
+    boto3 clients are thread-safe, so worker threads share its connection pool.
+    """
+    key = (aws_access_key, aws_region)
+    entry = _clients.get(key)
+    if entry is not None and entry[1] == aws_secret_key:
+        return entry[0]
+
+    with _lock:
+        entry = _clients.get(key)
+        if entry is None or entry[1] != aws_secret_key:
+            if _client_factory is not None:
+                client = _client_factory(aws_access_key, aws_secret_key, aws_region, _build_config())
+            else:
+                import boto3
+
+                # Use a dedicated session: boto3.client() goes through the default
+                # session, whose creation is not thread-safe.
+                session = boto3.session.Session(
+                    aws_access_key_id=aws_access_key,
+                    aws_secret_access_key=aws_secret_key,
+                    region_name=aws_region,
+                )
+                client = session.client("bedrock-runtime", config=_build_config())
+            # Remember the secret so a corrected secret for the same key gets a new client.
+            entry = (client, aws_secret_key)
+            _clients[key] = entry
+    return entry[0]
+
+
+class _ModelGuard:
+    """Rate limiters, adaptive concurrency and circuit breaker shared by all calls to one model."""
+
+    def __init__(self, limits):
+        self.requests = TokenBucket(limits["requests_per_second"], max(limits["requests_per_second"], 1))
+        # Bursts up to 1/6 of the per-minute budget (10 seconds' worth).
+        tokens_per_second = limits["tokens_per_minute"] / 60
+        self.tokens = TokenBucket(tokens_per_second, tokens_per_second * 10)
+        self.concurrency = AdaptiveConcurrencyLimiter(limits["max_concurrency"])
+        self.breaker = CircuitBreaker(RETRY_SETTINGS["breaker_failures"], RETRY_SETTINGS["breaker_reset"])
+
+
+def configure_model_limits(model_id, **limits):
+    """Override the quotas used for `model_id` (requests_per_second, tokens_per_minute, max_concurrency)."""
+    with _lock:
+        MODEL_LIMITS[model_id] = dict(MODEL_LIMITS.get(model_id, MODEL_LIMITS["default"]), **limits)
+        _model_guards.pop(model_id, None)
+
+
+def _get_model_guard(model_id):
+    guard = _model_guards.get(model_id)
+    if guard is None:
+        with _lock:
+            guard = _model_guards.get(model_id)
+            if guard is None:
+                guard = _ModelGuard(MODEL_LIMITS.get(model_id, MODEL_LIMITS["default"]))
+                _model_guards[model_id] = guard
+    return guard
+
+
+def estimate_tokens(text):
+    """Rough token count for quota accounting (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _record_token_usage(metrics, model_id, response, result):
+    """Count the input/output tokens Bedrock reports for a call (response headers, or Titan's body field)."""
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    input_tokens = headers.get("x-amzn-bedrock-input-token-count", result.get("inputTextTokenCount"))
+    output_tokens = headers.get("x-amzn-bedrock-output-token-count")
+    if input_tokens is not None:
+        metrics.incr("bedrock_input_tokens", int(input_tokens), model=model_id)
+    if output_tokens is not None:
+        metrics.incr("bedrock_output_tokens", int(output_tokens), model=model_id)
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff, so retrying workers spread out instead of retrying in lockstep."""
+    cap = min(RETRY_SETTINGS["max_delay"], RETRY_SETTINGS["base_delay"] * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def invoke_model(model_id, body, aws_access_key, aws_secret_key, aws_region, estimated_tokens=1):
+    """
+    Call Bedrock InvokeModel through the shared client, rate limiters and circuit breaker.
+
+    Calls are paced by per-model request/s and token/min buckets and an AIMD concurrency
+    limit that halves on throttling. Only throttling, transient server errors and
+    connection errors are retried, with jittered exponential backoff; auth and validation
+    errors are raised at once.
+
+    Args:
+        body: Request dict, serialised to JSON.
+        estimated_tokens: Tokens the call counts against the model's per-minute quota.
+
+    Returns:
+        dict: The decoded response body.
+
+    Raises:
+        botocore.exceptions.ClientError: Non-retryable errors, or the last retryable one.
+        CircuitOpenError: When the model has failed repeatedly and is being rested.
+    """
+    guard = _get_model_guard(model_id)
+    client = get_bedrock_client(aws_access_key, aws_secret_key, aws_region)
+    payload = json.dumps(body)
+    max_retries = RETRY_SETTINGS["max_retries"]
+    metrics = get_metrics()
+
+    for attempt in range(max_retries + 1):
+        guard.breaker.before_call()
+        guard.requests.acquire(1)
+        guard.tokens.acquire(estimated_tokens)
+        with guard.concurrency:
+            metrics.incr("bedrock_calls", model=model_id)
+            try:
+                with metrics.timer("bedrock_call_seconds", model=model_id):
+                    response = client.invoke_model(
+                        body=payload,
+                        modelId=model_id,
+                        accept="application/json",
+                        contentType="application/json",
+                    )
+                    result = json.loads(response["body"].read())
+            except botocore.exceptions.ClientError as e:
+                code = e.response.get("Error", {}).get("Code", "")
+                metrics.incr("bedrock_errors", model=model_id, code=code)
+                if code in THROTTLING_ERRORS:
+                    metrics.incr("bedrock_throttles", model=model_id)
+                    guard.concurrency.on_throttle()
+                    guard.breaker.record_neutral()
+                elif code in RETRYABLE_ERRORS:
+                    guard.breaker.record_failure()
+                else:
+                    # The service answered; the request itself is bad (auth, validation, quota).
+                    guard.breaker.record_neutral()
+                    raise
+                if attempt == max_retries:
+                    raise
+                error = f"{code}: {e}"
+            except _CONNECTION_ERRORS as e:
+                metrics.incr("bedrock_errors", model=model_id, code=type(e).__name__)
+                guard.breaker.record_failure()
+                if attempt == max_retries:
+                    raise
+                error = str(e)
+            except Exception as e:
+                # Anything else (a broken response stream, bad parameters, undecodable JSON) is
+                # not retried, but must still end a half-open trial or the breaker stays shut.
+                metrics.incr("bedrock_errors", model=model_id, code=type(e).__name__)
+                guard.breaker.record_neutral()
+                raise
+            else:
+                guard.concurrency.on_success()
+                guard.breaker.record_success()
+                _record_token_usage(metrics, model_id, response, result)
+                return result
+
+        metrics.incr("bedrock_retries", model=model_id)
+        delay = _backoff(attempt)
+        logger.warning(f"[{model_id}] Retry {attempt + 1}/{max_retries} in {delay:.2f}s after {error} "
+                       f"(concurrency limit {guard.concurrency.limit:.1f})")
+        time.sleep(delay)
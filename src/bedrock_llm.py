@@ -1,19 +1,23 @@
-import boto3
-import json
 import re
-import time
-import botocore.exceptions
 from src.logger import logger
+from src.bedrock_client import estimate_tokens, invoke_model
+from src.cache import cache_key, content_hash, get_cache
 #from config import AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION
 import os
 
+SKILL_MODEL_ID = 'anthropic.claude-v2'
+# Bump whenever the prompt or the parsing of its output changes, to invalidate cached skills.
+PROMPT_VERSION = "1"
+MAX_TOKENS_TO_SAMPLE = 1000
+
+
 def set_bedrock_credentials(access_key, secret_key, region):
     os.environ["AWS_ACCESS_KEY_ID"] = access_key
     os.environ["AWS_SECRET_ACCESS_KEY"] = secret_key
     os.environ["AWS_REGION"] = region
 
 
-def run_skill_extraction_prompt(text, aws_access_key, aws_secret_key, aws_region, retries=3):
+def run_skill_extraction_prompt(text, aws_access_key, aws_secret_key, aws_region):
     """
     Calls Anthropic Claude v2 via Bedrock to extract technical skills
     from a given resume or job description text.
@@ -29,16 +33,11 @@ def run_skill_extraction_prompt(text, aws_access_key, aws_secret_key, aws_region
     #     aws_secret_access_key=AWS_SECRET_KEY,
     #     region_name=AWS_REGION
     # )
-    client = boto3.client(
-        service_name='bedrock-runtime',
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-        region_name=aws_region
-    )
-
-    model_id = 'anthropic.claude-v2'
-    accept = 'application/json'
-    content_type = 'application/json'
+    cache = get_cache()
+    key = cache_key(content_hash(text), SKILL_MODEL_ID, PROMPT_VERSION)
+    cached = cache.get("skills", key)
+    if cached is not None:
+        return cached
 
     prompt = f"""
 Human: Extract only the technical skills from the following text. These should include programming languages, frameworks, libraries, software tools, cloud platforms, and technical certifications. Return the skills as a valid Python list of strings. Do not include soft skills, company names, locations, or general strengths.
@@ -48,37 +47,25 @@ Text:
 
 Assistant:"""
 
-    body = json.dumps({
+    body = {
         "prompt": prompt,
-        "max_tokens_to_sample": 1000,
+        "max_tokens_to_sample": MAX_TOKENS_TO_SAMPLE,
         "temperature": 0.2,
         "top_p": 0.9,
-    })
-
-    for attempt in range(retries):
-        try:
-            response = client.invoke_model(
-                body=body,
-                modelId=model_id,
-                accept=accept,
-                contentType=content_type,
-            )
-            response_body = json.loads(response['body'].read())
-            output_text = response_body.get('completion', '')
+    }
 
-            skills_list = []
-            match = re.search(r"\[([^\]]+)\]", output_text)
-            if match:
-                raw_items = match.group(1).split(',')
-                skills_list = [item.strip().strip("'\"").lower() for item in raw_items if item.strip()]
+    # Retries, throttling and rate limiting are handled by invoke_model.
+    response_body = invoke_model(SKILL_MODEL_ID, body, aws_access_key, aws_secret_key, aws_region,
+                                 estimated_tokens=estimate_tokens(prompt) + MAX_TOKENS_TO_SAMPLE)
+    output_text = response_body.get('completion', '')
 
-            logger.info(f"LLM Extracted Skills: {text}")
-            return list(set(skills_list))  # remove duplicates
+    skills_list = []
+    match = re.search(r"\[([^\]]+)\]", output_text)
+    if match:
+        raw_items = match.group(1).split(',')
+        skills_list = [item.strip().strip("'\"").lower() for item in raw_items if item.strip()]
 
-        except botocore.exceptions.ClientError as e:
-            if attempt < retries - 1:
-                wait_time = 2 ** attempt
-                print(f"[Claude] Retry {attempt+1}/{retries}: waiting {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                raise e
+    skills_list = list(set(skills_list))  # remove duplicates
+    logger.debug(f"LLM extracted {len(skills_list)} skills from {len(text)} characters")
+    cache.set("skills", key, skills_list)
+    return skills_list
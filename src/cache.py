@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.logger import logger
+
+CACHE_PATH = os.getenv("RESUME_MATCHER_CACHE", ".cache/resume_matcher.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("RESUME_MATCHER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+CACHE_MAX_AGE = int(os.getenv("RESUME_MATCHER_CACHE_MAX_AGE", 30 * 24 * 3600))
+
+# Eviction runs every this many writes rather than on each one.
+_EVICT_EVERY = 200
+
+
+def content_hash(content):
+    """SHA-256 hex digest of str or bytes content."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def stream_hash(stream, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a binary stream, read in chunks from its current position."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file's bytes, read in chunks."""
+    with open(file_path, "rb") as f:
+        return stream_hash(f, chunk_size)
+
+
+def cache_key(digest, model_id="", version=""):
+    """Cache key for content with hash `digest` processed by `model_id` at `version`."""
+    return f"{digest}:{model_id}:{version}"
+
+
+class DiskCache:
+    """
+    Content-addressed key/value cache stored in SQLite.
+
+    Entries live in a namespace ("parse", "skills", "embedding", ...) and are keyed by
+    a content hash plus the model id and prompt/parser version that produced them, so
+    changing any of those yields a miss rather than a stale value. Values must be JSON
+    serialisable. Least recently used entries are evicted past `max_bytes`, and entries
+    older than `max_age` seconds are dropped. Safe to share between threads and processes.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace   TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                value       TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+
+    def _count(self, namespace, outcome):
+        counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, namespace, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self._count(namespace, "misses")
+                return default
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+            self._count(namespace, "hits")
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def get_or_compute(self, namespace, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        sentinel = object()
+        value = self.get(namespace, key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(namespace, key, value)
+        return value
+
+    def _evict(self, now):
+        if self.max_age:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.max_age,))
+        if self.max_bytes:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                # Trim to 90% of the budget so we don't evict again on the next write.
+                excess = total - int(self.max_bytes * 0.9)
+                freed = 0
+                doomed = []
+                for namespace, key, size in self._conn.execute(
+                    "SELECT namespace, key, size FROM entries ORDER BY accessed_at"
+                ):
+                    doomed.append((namespace, key))
+                    freed += size
+                    if freed >= excess:
+                        break
+                self._conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+                logger.info(f"Cache evicted {len(doomed)} entries ({freed} bytes)")
+
+    def evict(self):
+        """Apply age and size limits now."""
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM entries")
+            else:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def stats(self):
+        """Hit/miss counters per namespace for this process, plus hit ratio."""
+        with self._lock:
+            summary = {}
+            for namespace, counters in self._stats.items():
+                total = counters["hits"] + counters["misses"]
+                summary[namespace] = dict(counters, hit_ratio=round(counters["hits"] / total, 4) if total else 0.0)
+            return summary
+
+
+_default_cache = None
+_default_pid = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide DiskCache at CACHE_PATH (reopened after fork, SQLite handles can't be shared)."""
+    global _default_cache, _default_pid
+    if _default_cache is None or _default_pid != os.getpid():
+        with _default_lock:
+            if _default_cache is None or _default_pid != os.getpid():
+                _default_cache = DiskCache()
+                _default_pid = os.getpid()
+    return _default_cache
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+from src.logger import logger
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of analysed documents for a batch run.
+
+    Each line records one document's content hash with its extracted skills and
+    embedding, flushed as soon as the document completes. Re-running the same batch
+    with the same checkpoint file skips every document already recorded, so a run
+    that dies halfway resumes instead of calling Bedrock for everything again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            complete = 0
+            with open(path, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.endswith(b"\n"):
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        logger.warning(f"Ignoring corrupt checkpoint line {line_number} in {path}")
+                        continue
+                    self._done[record["hash"]] = (record["skills"], record["embedding"])
+            if os.path.getsize(path) > complete:
+                # A torn last line from a crash: cut it off, or the next record would be
+                # appended to it and lost with it.
+                logger.warning(f"Dropping incomplete last line of checkpoint {path}")
+                os.truncate(path, complete)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._done)
+
+    def get(self, doc_hash):
+        """(skills, embedding) recorded for a document, or None."""
+        return self._done.get(doc_hash)
+
+    def record(self, doc_hash, skills, embedding):
+        with self._lock:
+            if doc_hash in self._done:
+                return
+            self._done[doc_hash] = (skills, embedding)
+            self._file.write(json.dumps({"hash": doc_hash, "skills": skills, "embedding": embedding}) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
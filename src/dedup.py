@@ -0,0 +1,106 @@
+import re
+import zlib
+import numpy as np
+from src.cache import content_hash
+from src.logger import logger
+
+# Word n-grams compared between documents.
+SHINGLE_SIZE = 5
+# MinHash signature length, split into LSH_BANDS bands of NUM_PERM / LSH_BANDS rows.
+# 16 bands x 8 rows make pairs with Jaccard similarity above ~0.7 likely to share a band.
+NUM_PERM = 128
+LSH_BANDS = 16
+# Estimated Jaccard similarity of word shingles at which two resumes are the same CV.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+
+_TOKEN = re.compile(r"[\w+#]+")
+
+
+def normalise_text(text):
+    """Lowercase words only, so PDF and DOCX renderings of one document compare equal."""
+    return " ".join(_TOKEN.findall(text.lower()))
+
+
+def _shingles(words):
+    """32-bit hashes of the distinct word n-grams of a document."""
+    if len(words) <= SHINGLE_SIZE:
+        grams = [" ".join(words)]
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64)
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    Each of the `num_perm` hash functions is splitmix64 over the shingle hash xor a
+    random seed; the fraction of equal positions in two signatures estimates the
+    Jaccard similarity of the documents' shingle sets.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        self._seeds = np.random.default_rng(seed).integers(0, np.iinfo(np.uint64).max, size=num_perm,
+                                                           dtype=np.uint64, endpoint=True)[:, None]
+
+    def signature(self, text):
+        shingles = _shingles(normalise_text(text).split())
+        return _splitmix64(shingles[None, :] ^ self._seeds).min(axis=1)
+
+
+def _splitmix64(values):
+    """splitmix64 finaliser; uint64 arithmetic wraps, which is what the mixer relies on."""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def find_duplicates(texts, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Group exact and near-duplicate documents.
+
+    Exact copies are found by hashing the normalised text. Near-duplicates are found
+    with MinHash + LSH banding: only documents sharing a band bucket are compared, so a
+    batch costs O(n) signatures instead of O(n^2) comparisons. Each document joins the
+    first earlier representative it matches, so clusters never chain.
+
+    Returns:
+        List[int]: For each text, the index of its cluster's representative (the first
+        member in input order); representatives map to themselves.
+    """
+    hasher = MinHasher()
+    rows = NUM_PERM // LSH_BANDS
+    exact, buckets = {}, {}
+    signatures = {}
+    representative = []
+    exact_count = near_count = 0
+
+    for i, text in enumerate(texts):
+        digest = content_hash(normalise_text(text))
+        if digest in exact:
+            representative.append(exact[digest])
+            exact_count += 1
+            continue
+
+        signature = hasher.signature(text)
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+        match = None
+        for candidate in sorted({rep for key in keys for rep in buckets.get(key, ())}):
+            if np.mean(signatures[candidate] == signature) >= threshold:
+                match = candidate
+                break
+
+        if match is None:
+            match = i
+            signatures[i] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(i)
+        else:
+            near_count += 1
+        exact[digest] = match
+        representative.append(match)
+
+    if exact_count or near_count:
+        logger.info(f"Deduplicated {len(texts)} documents: {exact_count} exact and {near_count} near duplicates")
+    return representative
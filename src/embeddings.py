@@ -1,34 +1,39 @@
-import boto3
-import json
-import time
-import botocore.exceptions
-import streamlit as st
+import numpy as np
+from src.bedrock_client import estimate_tokens, invoke_model
+from src.cache import cache_key, content_hash, get_cache
+from src.preprocess import prepare_document
 
-@st.cache_data(show_spinner=False)
-def generate_embeddings(text, aws_access_key, aws_secret_key, aws_region, retries=3):
-    """Convert text into embeddings using Titan Embeddings G1 - Text with retry logic."""
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+
+def generate_embeddings(text, aws_access_key, aws_secret_key, aws_region):
+    """Convert text into embeddings using Titan Embeddings G1 - Text (retries are handled by invoke_model)."""
     if not text.strip():
         raise ValueError("❌ Text input to generate_embeddings() is empty.")
-    # ... continue with existing logic
-    client = boto3.client("bedrock-runtime",
-                          aws_access_key_id=aws_access_key,
-                          aws_secret_access_key=aws_secret_key,
-                          region_name=aws_region)
+    cache = get_cache()
+    key = cache_key(content_hash(text), EMBEDDING_MODEL_ID)
+    cached = cache.get("embedding", key)
+    if cached is not None:
+        return cached
+
+    response_body = invoke_model(EMBEDDING_MODEL_ID, {"inputText": text}, aws_access_key, aws_secret_key,
+                                 aws_region, estimated_tokens=estimate_tokens(text))
+    embedding = response_body["embedding"]
+    cache.set("embedding", key, embedding)
+    return embedding
+
+
+def generate_document_embedding(text, aws_access_key, aws_secret_key, aws_region):
+    """
+    Embedding of a whole resume or job description, from its preprocessed text
+    (see preprocess.prepare_document). Documents over the Titan token budget are
+    embedded in chunks, and the unit chunk vectors are averaged weighted by chunk length.
+    """
+    chunks = prepare_document(text)["embedding_chunks"]
+    if len(chunks) == 1:
+        return generate_embeddings(chunks[0], aws_access_key, aws_secret_key, aws_region)
 
-    for attempt in range(retries):
-        try:
-            response = client.invoke_model(
-                modelId="amazon.titan-embed-text-v1",
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps({"inputText": text})
-            )
-            response_body = json.loads(response["body"].read())
-            return response_body["embedding"]
-        except botocore.exceptions.ClientError as e:
-            if attempt < retries - 1:
-                wait_time = 2 ** attempt
-                print(f"[Titan] Retry {attempt+1}/{retries}: waiting {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                raise e
+    vectors = np.array([generate_embeddings(chunk, aws_access_key, aws_secret_key, aws_region) for chunk in chunks],
+                       dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    weights = np.array([len(chunk) for chunk in chunks], dtype=np.float32)
+    return (weights @ vectors / weights.sum()).tolist()
@@ -0,0 +1,359 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import nullcontext
+from src.checkpoint import Checkpoint
+from src.ingest import dedupe_name, link_source, list_zip_members
+from src.logger import logger
+from src.metrics import get_metrics, new_run_metrics
+from src.parser import DOCUMENT_EXTENSIONS, RESUME_EXTENSIONS, parse_documents
+from src.preprocess import token_report
+from src.report import DEFAULT_MAX_CONCURRENCY, DEFAULT_SKILL_MODE, generate_match_matrix, iter_match_results
+from src.results_store import RESULT_COLUMNS, ResultStore
+from src.vector_index import index_resumes
+
+DEFAULT_MIN_MATCH_SCORE = 70
+
+REPORT_COLUMNS = list(RESULT_COLUMNS.values())
+# Already compressed, so they are stored in archives as-is instead of deflated again.
+STORED_EXTENSIONS = (".pdf", ".docx")
+_archive_lock = threading.Lock()
+
+TOKEN_REPORT_COLUMNS = [
+    "Document",
+    "Original Tokens",
+    "Skill Prompt Tokens",
+    "Embedding Tokens",
+    "Tokens Saved",
+]
+
+
+def collect_sources(path, allowed_ext):
+    """
+    Find input documents under `path`: a single file, a directory (searched
+    recursively) or a ZIP archive. Names repeated across folders or archives get a
+    numeric suffix (cv.pdf, cv_1.pdf, ...), in walk order.
+
+    Returns:
+        Dict[str, source]: File name -> path or (zip path, member name).
+    """
+    sources = {}
+    _collect_sources(path, allowed_ext, sources)
+    return sources
+
+
+def _collect_sources(path, allowed_ext, sources):
+    # Every name goes through dedupe_name against the names found so far, so files with
+    # the same name in different folders or archives are all kept (cv.pdf, cv_1.pdf, ...).
+    if os.path.isfile(path) and path.lower().endswith(".zip"):
+        for name, member in list_zip_members(path, allowed_ext):
+            sources[dedupe_name(name, sources)] = (path, member)
+        return
+    if os.path.isfile(path):
+        sources[dedupe_name(os.path.basename(path), sources)] = path
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            if file_name.lower().endswith(".zip"):
+                _collect_sources(file_path, allowed_ext, sources)
+            elif file_name.lower().endswith(tuple(allowed_ext)):
+                sources[dedupe_name(file_name, sources)] = file_path
+
+
+def jd_report_name(jd_file_name):
+    """Report name for a JD file: its stem with spaces replaced."""
+    return os.path.splitext(jd_file_name)[0].replace(" ", "_")
+
+
+def jd_report_names(jd_file_names):
+    """
+    Unique report names for JD files, keyed by file name: each file's jd_report_name, or
+    <stem>_<ext> when an earlier JD already has that stem (role.txt -> role,
+    role.docx -> role_docx), so no JD's report overwrites another's.
+    """
+    names = {}
+    used = set()
+    for file_name in jd_file_names:
+        name = jd_report_name(file_name)
+        if name in used:
+            ext = os.path.splitext(file_name)[1].lstrip(".").lower()
+            name = dedupe_name(f"{name}_{ext}" if ext else name, used)
+        used.add(name)
+        names[file_name] = name
+    return names
+
+
+def _parse_inputs(jd_sources, resume_sources, parse_workers=None):
+    """
+    Parse JDs and resumes, recording parse metrics, and add each document's model input
+    token counts before and after preprocessing as "tokens" (see preprocess.token_report).
+    Returns (jd_parsed, resume_parsed).
+    """
+    metrics = get_metrics()
+    with metrics.timer("stage_seconds", stage="parse"):
+        jd_parsed = parse_documents(jd_sources, allowed_ext=DOCUMENT_EXTENSIONS, max_workers=parse_workers)
+        resume_parsed = parse_documents(resume_sources, allowed_ext=RESUME_EXTENSIONS, max_workers=parse_workers)
+    with metrics.timer("stage_seconds", stage="preprocess"):
+        for doc in jd_parsed + resume_parsed:
+            metrics.incr("documents", status=doc["status"])
+            metrics.observe("document_seconds", doc["duration"], stage="parse")
+            if doc["text"].strip():
+                doc["tokens"] = token_report(doc["text"])
+                for kind, count in doc["tokens"].items():
+                    metrics.incr("document_tokens", count, kind=kind)
+    return jd_parsed, resume_parsed
+
+
+def _open_checkpoint(checkpoint_path):
+    """Checkpoint for `checkpoint_path`, or a no-op context when there is none."""
+    if not checkpoint_path:
+        return nullcontext()
+    checkpoint = Checkpoint(checkpoint_path)
+    if len(checkpoint):
+        logger.info(f"Resuming from checkpoint {checkpoint_path} ({len(checkpoint)} documents done)")
+    return checkpoint
+
+
+def _finish_run(start, reports, jd_parsed, resume_parsed, resume_texts, aws_access_key, aws_secret_key,
+                aws_region, max_concurrency, min_match_score, index, skill_mode, two_stage):
+    """Index resumes, select those at or above `min_match_score` and build the run dict."""
+    metrics = get_metrics()
+    indexed = 0
+    if index is not None:
+        # Skills and embeddings are served from the cache populated by the matching pass.
+        # Two-stage runs index local skills, so resumes that were not shortlisted stay LLM-free.
+        with metrics.timer("stage_seconds", stage="index"):
+            indexed = index_resumes(index, resume_texts, aws_access_key, aws_secret_key, aws_region,
+                                    max_concurrency, "local" if two_stage else skill_mode)
+
+    selected = {
+        jd_name: [result["resume"] for result in results if result["embedding_score"] >= min_match_score]
+        for jd_name, results in reports.items()
+    }
+    duration = round(time.perf_counter() - start, 2)
+    logger.info(f"Matching run finished in {duration}s: {len(resume_texts)} resumes x {len(reports)} JDs")
+    return {
+        "reports": reports,
+        "selected": selected,
+        "parsed": jd_parsed + resume_parsed,
+        "indexed": indexed,
+        "duration": duration,
+        "metrics": metrics.summary(),
+    }
+
+
+def run_matching(jd_sources, resume_sources, aws_access_key, aws_secret_key, aws_region,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, min_match_score=DEFAULT_MIN_MATCH_SCORE,
+                 checkpoint_path=None, parse_workers=None, index=None, skill_mode=DEFAULT_SKILL_MODE,
+                 two_stage=False, shortlist_top_n=None, deduplicate=True, progress=None):
+    """
+    Parse and match every resume against every job description.
+
+    Args:
+        jd_sources, resume_sources: Dict of file name -> source (see collect_sources).
+        checkpoint_path: Optional JSONL file recording analysed documents, so an
+            interrupted run picks up where it stopped.
+        index: Optional `ResumeIndex` the parsed resumes are added to.
+        skill_mode: "llm", "local" or "hybrid" (see report.SKILL_MODES).
+        two_stage: Only run `skill_mode` extraction on resumes whose embedding score reaches
+            `min_match_score` (capped to the `shortlist_top_n` best per JD); the rest are
+            reported with local skills (see report.generate_match_matrix).
+        deduplicate: Analyse duplicate resumes once and report the result for every copy.
+        progress: Optional callable(done, total) over analysed documents, from the end
+            of parsing on (see report.generate_match_matrix); raising from it stops the run.
+
+    Returns:
+        dict: "reports" (JD name -> per-resume results), "selected" (JD name -> resume
+        names at or above `min_match_score`), "parsed" (per-file parse results),
+        "indexed" (resumes newly added to `index`), "duration" in seconds and "metrics"
+        (the run summary at the end of matching; see metrics.Metrics.summary).
+    """
+    start = time.perf_counter()
+    new_run_metrics()
+    jd_parsed, resume_parsed = _parse_inputs(jd_sources, resume_sources, parse_workers)
+    report_names = jd_report_names(doc["name"] for doc in jd_parsed)
+    job_texts = {report_names[doc["name"]]: doc["text"] for doc in jd_parsed}
+    resume_texts = {doc["name"]: doc["text"] for doc in resume_parsed}
+
+    with _open_checkpoint(checkpoint_path) as checkpoint:
+        reports = generate_match_matrix(
+            resume_texts, job_texts, aws_access_key, aws_secret_key, aws_region,
+            max_concurrency=max_concurrency, checkpoint=checkpoint, skill_mode=skill_mode,
+            shortlist_min_score=min_match_score if two_stage else None,
+            shortlist_top_n=shortlist_top_n if two_stage else None, deduplicate=deduplicate, progress=progress
+        )
+
+    return _finish_run(start, reports, jd_parsed, resume_parsed, resume_texts, aws_access_key, aws_secret_key,
+                       aws_region, max_concurrency, min_match_score, index, skill_mode, two_stage)
+
+
+def stream_matching(jd_sources, resume_sources, aws_access_key, aws_secret_key, aws_region,
+                    max_concurrency=DEFAULT_MAX_CONCURRENCY, min_match_score=DEFAULT_MIN_MATCH_SCORE,
+                    checkpoint_path=None, parse_workers=None, index=None, skill_mode=DEFAULT_SKILL_MODE,
+                    two_stage=False, deduplicate=True):
+    """
+    Streaming run_matching: yields progress events while the batch is processed.
+
+    Arguments are as for run_matching; two-stage runs shortlist on `min_match_score`
+    only, as a top-N cap needs every stage-1 score before anything can be reported.
+
+    Yields:
+        dict: Events, by "event":
+            "parsed": after parsing, with "parsed" (per-file results), "jds" (report
+                names) and "total" (resumes to match).
+            "result": once per resume as it completes, with "resume", "results"
+                (JD name -> result), "done" and "total".
+            "done": last, with "run" — the same dict run_matching returns, reports in
+                resume input order.
+    """
+    start = time.perf_counter()
+    new_run_metrics()
+    jd_parsed, resume_parsed = _parse_inputs(jd_sources, resume_sources, parse_workers)
+    report_names = jd_report_names(doc["name"] for doc in jd_parsed)
+    job_texts = {report_names[doc["name"]]: doc["text"] for doc in jd_parsed}
+    resume_texts = {doc["name"]: doc["text"] for doc in resume_parsed}
+    total = sum(1 for text in resume_texts.values() if text.strip())
+    yield {"event": "parsed", "parsed": jd_parsed + resume_parsed, "jds": list(job_texts), "total": total}
+
+    completed = {}
+    # Wall time while results stream, including time the consumer spends on each event.
+    analyse_start = time.perf_counter()
+    with _open_checkpoint(checkpoint_path) as checkpoint:
+        for resume_name, results in iter_match_results(
+            resume_texts, job_texts, aws_access_key, aws_secret_key, aws_region,
+            max_concurrency=max_concurrency, checkpoint=checkpoint, skill_mode=skill_mode,
+            shortlist_min_score=min_match_score if two_stage else None, deduplicate=deduplicate
+        ):
+            completed[resume_name] = results
+            yield {"event": "result", "resume": resume_name, "results": results,
+                   "done": len(completed), "total": total}
+
+    get_metrics().observe("stage_seconds", time.perf_counter() - analyse_start, stage="analyse")
+
+    reports = {jd_name: [] for jd_name in job_texts}
+    for resume_name in resume_texts:
+        for jd_name, result in completed.get(resume_name, {}).items():
+            reports[jd_name].append(result)
+    yield {"event": "done", "run": _finish_run(start, reports, jd_parsed, resume_parsed, resume_texts,
+                                               aws_access_key, aws_secret_key, aws_region, max_concurrency,
+                                               min_match_score, index, skill_mode, two_stage)}
+
+
+def report_rows(results):
+    """Flatten per-resume results into report rows (see REPORT_COLUMNS)."""
+    return [
+        {
+            "Resume": result["resume"],
+            "Skills Match (%)": result["match_score"],
+            "Resume Match (%)": result["embedding_score"],
+            "All Resume Skills": ", ".join(sorted(result["all_resume_skills"])),
+            "Matching Skills with JD": ", ".join(sorted(result["matched_skills"])),
+            "Missing Skills from JD": ", ".join(sorted(result["missing_skills"])),
+            "Stage": result["stage"],
+            "Duplicate Of": result["duplicate_of"] or "",
+        }
+        for result in results
+    ]
+
+
+def token_rows(run):
+    """Per-document estimated input tokens before and after preprocessing (see TOKEN_REPORT_COLUMNS)."""
+    return [
+        {
+            "Document": doc["name"],
+            "Original Tokens": doc["tokens"]["original_tokens"],
+            "Skill Prompt Tokens": doc["tokens"]["skill_tokens"],
+            "Embedding Tokens": doc["tokens"]["embedding_tokens"],
+            "Tokens Saved": doc["tokens"]["tokens_saved"],
+        }
+        for doc in run["parsed"] if "tokens" in doc
+    ]
+
+
+def write_reports(run, output_dir, formats=("csv", "json")):
+    """
+    Write one report per JD to `output_dir` as <jd>_report.csv and/or <jd>_report.json,
+    with "parquet", every JD's results as a ResultStore in output_dir/results/, and with
+    "csv", the per-document token report as token_report.csv.
+
+    Returns:
+        List[str]: Paths written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    with get_metrics().timer("stage_seconds", stage="export"):
+        for jd_name, results in run["reports"].items():
+            if "csv" in formats:
+                csv_path = os.path.join(output_dir, f"{jd_name}_report.csv")
+                with open(csv_path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+                    writer.writeheader()
+                    writer.writerows(report_rows(results))
+                written.append(csv_path)
+            if "json" in formats:
+                json_path = os.path.join(output_dir, f"{jd_name}_report.json")
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump({"jd": jd_name, "selected": run["selected"][jd_name], "results": results}, f, indent=2)
+                written.append(json_path)
+        if "parquet" in formats:
+            store = ResultStore(os.path.join(output_dir, "results"))
+            store.clear()
+            store.add_reports(run["reports"])
+            written.append(store.folder)
+        if "csv" in formats:
+            token_path = os.path.join(output_dir, "token_report.csv")
+            with open(token_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=TOKEN_REPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(token_rows(run))
+            written.append(token_path)
+    return written
+
+
+def export_selected(run, resume_sources, output_dir):
+    """
+    Hard-link (or copy, see link_source) each JD's selected resumes into output_dir/<jd>/.
+    Returns the number of files exported.
+    """
+    copied = 0
+    with get_metrics().timer("stage_seconds", stage="export"):
+        for jd_name, names in run["selected"].items():
+            if not names:
+                continue
+            jd_dir = os.path.join(output_dir, jd_name)
+            os.makedirs(jd_dir, exist_ok=True)
+            for name in names:
+                link_source(resume_sources[name], os.path.join(jd_dir, name))
+                copied += 1
+    return copied
+
+
+def selected_archive(selected_folder, jd_name, names, run_id):
+    """
+    ZIP of one JD's resumes exported by export_selected, written to disk next to them on
+    the first call for `run_id` and reused afterwards. Members are streamed from disk;
+    PDF and DOCX files are stored uncompressed.
+
+    Returns:
+        str: Path of the archive.
+    """
+    archive_path = os.path.join(selected_folder, f"{jd_name}.{run_id}.zip")
+    with _archive_lock:
+        if os.path.exists(archive_path):
+            return archive_path
+        fd, part_path = tempfile.mkstemp(suffix=".part", dir=selected_folder)
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w") as zipf:
+            for name in names:
+                path = os.path.join(selected_folder, jd_name, name)
+                if os.path.exists(path):
+                    stored = name.lower().endswith(STORED_EXTENSIONS)
+                    zipf.write(path, name, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+        os.replace(part_path, archive_path)
+    return archive_path
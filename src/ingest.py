@@ -0,0 +1,194 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unicodedata
+import zipfile
+
+# Limits applied to uploaded ZIP archives. Sizes are checked against the headers up
+# front and against the bytes actually inflated while reading, so an archive that
+# lies about its sizes is still stopped.
+MAX_ZIP_MEMBERS = 5000
+MAX_MEMBER_SIZE = 50 * 1024 * 1024
+MAX_TOTAL_UNCOMPRESSED = 1024 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 200
+
+# Members up to this size are kept in memory while parsing; larger ones spill to a temp file.
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipLimitError(ValueError):
+    """Raised when an archive exceeds the ingestion limits."""
+
+
+def safe_file_name(file_name):
+    """
+    Normalise an archive member name to a flat ASCII file name without spaces. A name
+    with no ASCII left in its stem (e.g. "简历.pdf") gets a stem derived from a hash of
+    the original name, so it keeps its extension and stays distinct from its neighbours.
+    """
+    base_name = os.path.basename(file_name)
+    stem, ext = os.path.splitext(base_name)
+    if not ext and stem.startswith("."):
+        stem, ext = "", stem  # ".pdf" once its stem was stripped upstream
+    stem, ext = (_ascii(part).replace(" ", "_") for part in (stem, ext))
+    if not stem.strip("._"):
+        stem = f"file_{hashlib.sha1(base_name.encode('utf-8')).hexdigest()[:8]}"
+    return f"{stem}{ext}"
+
+
+def _ascii(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def dedupe_name(name, used):
+    """Return `name`, or `name_1.ext`, `name_2.ext`, ... if already taken."""
+    if name not in used:
+        return name
+    stem, ext = os.path.splitext(name)
+    n = 1
+    while f"{stem}_{n}{ext}" in used:
+        n += 1
+    return f"{stem}_{n}{ext}"
+
+
+def list_zip_members(zip_path, allowed_ext, max_members=MAX_ZIP_MEMBERS, max_member_size=MAX_MEMBER_SIZE,
+                     max_total_size=MAX_TOTAL_UNCOMPRESSED, max_ratio=MAX_COMPRESSION_RATIO):
+    """
+    List the usable members of a ZIP without decompressing anything.
+
+    Members are taken in archive order; names are normalised with `safe_file_name`
+    and collisions get a numeric suffix (dedupe_name), so the mapping is deterministic.
+
+    Args:
+        zip_path: Path or seekable file object of the archive.
+        allowed_ext: Iterable of extensions, with or without the leading dot.
+
+    Returns:
+        List[Tuple[str, str]]: (safe name, member name) pairs.
+
+    Raises:
+        ZipLimitError: If the member count, a member size, the total uncompressed
+        size or a compression ratio exceeds its limit.
+    """
+    allowed_ext = tuple(ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in allowed_ext)
+    members = []
+    used = set()
+    total = 0
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(allowed_ext):
+                continue
+            if os.path.basename(info.filename).startswith(("._", "~$")):
+                continue  # macOS resource forks and Office lock files
+            if len(members) >= max_members:
+                raise ZipLimitError(f"Archive has more than {max_members} files.")
+            if info.file_size > max_member_size:
+                raise ZipLimitError(f"{info.filename} is larger than {max_member_size // (1024 * 1024)} MB.")
+            if info.compress_size and info.file_size / info.compress_size > max_ratio:
+                raise ZipLimitError(f"{info.filename} has a suspicious compression ratio.")
+            total += info.file_size
+            if total > max_total_size:
+                raise ZipLimitError(f"Archive expands to more than {max_total_size // (1024 * 1024)} MB.")
+
+            name = dedupe_name(safe_file_name(info.filename), used)
+            used.add(name)
+            members.append((name, info.filename))
+    return members
+
+
+def open_member(zip_ref, member_name, max_size=MAX_MEMBER_SIZE, spool_threshold=SPOOL_THRESHOLD):
+    """
+    Inflate one member into a seekable stream (in memory, spilling to disk past
+    `spool_threshold`). Parsers need random access, which a raw ZipExtFile only
+    offers by re-inflating from the start.
+
+    Raises:
+        ZipLimitError: If the member inflates to more than `max_size` bytes.
+    """
+    stream = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+    written = 0
+    with zip_ref.open(member_name) as member:
+        for chunk in iter(lambda: member.read(_CHUNK_SIZE), b""):
+            written += len(chunk)
+            if written > max_size:
+                stream.close()
+                raise ZipLimitError(f"{member_name} inflates past {max_size // (1024 * 1024)} MB.")
+            stream.write(chunk)
+    stream.seek(0)
+    return stream
+
+
+def save_upload(uploaded_file, save_dir):
+    """
+    Stream an uploaded file object to `save_dir` without buffering it whole. The file is
+    written beside the target and renamed over it, so re-uploading a name never rewrites
+    a copy hard-linked by `link_source`.
+    """
+    file_path = os.path.join(save_dir, safe_file_name(uploaded_file.name))
+    uploaded_file.seek(0)
+    with open(file_path + ".part", "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, _CHUNK_SIZE)
+    os.replace(file_path + ".part", file_path)
+    return file_path
+
+
+def source_name(source):
+    """
+    Default file name of a document source: a path, or a (zip path, member name) pair.
+    Names from `list_zip_members` are preferred, as they are deduplicated.
+    """
+    if isinstance(source, tuple):
+        return safe_file_name(source[1])
+    return os.path.basename(source)
+
+
+def open_source(source, max_size=MAX_MEMBER_SIZE):
+    """Open a document source for binary reading (a path, or a (zip path, member name) pair)."""
+    if isinstance(source, tuple):
+        zip_path, member_name = source
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            return open_member(zip_ref, member_name, max_size)
+    return open(source, "rb")
+
+
+def copy_source(source, dst_path, max_size=MAX_MEMBER_SIZE):
+    """
+    Write a document source to `dst_path`. Files are copied by shutil.copyfile, which
+    uses sendfile on Linux; ZIP members are inflated straight into `dst_path`.
+
+    Raises:
+        ZipLimitError: If a ZIP member inflates to more than `max_size` bytes.
+    """
+    if not isinstance(source, tuple):
+        shutil.copyfile(source, dst_path)
+        return dst_path
+    zip_path, member_name = source
+    written = 0
+    with zipfile.ZipFile(zip_path, "r") as zip_ref, zip_ref.open(member_name) as src, open(dst_path, "wb") as dst:
+        for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+            written += len(chunk)
+            if written > max_size:
+                break
+            dst.write(chunk)
+    if written > max_size:
+        os.remove(dst_path)
+        raise ZipLimitError(f"{member_name} inflates past {max_size // (1024 * 1024)} MB.")
+    return dst_path
+
+
+def link_source(source, dst_path):
+    """
+    Hard-link a file source to `dst_path`, so exporting it copies no data. Falls back to
+    copy_source for ZIP members and when linking fails (another filesystem, no link support).
+    """
+    if not isinstance(source, tuple):
+        try:
+            if os.path.lexists(dst_path):
+                os.remove(dst_path)
+            os.link(source, dst_path)
+            return dst_path
+        except OSError:
+            pass
+    return copy_source(source, dst_path)
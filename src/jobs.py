@@ -0,0 +1,490 @@
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from src.bedrock_client import MODEL_LIMITS, configure_model_limits
+from src.bedrock_llm import SKILL_MODEL_ID
+from src.embeddings import EMBEDDING_MODEL_ID
+from src.engine import export_selected, run_matching, stream_matching, write_reports
+from src.logger import logger, use_process_log_file
+from src.metrics import get_metrics
+from src.results_store import ResultStore
+
+JOBS_FOLDER = os.getenv("RESUME_MATCHER_JOBS_FOLDER", "data/jobs/")
+JOBS_DB_PATH = os.path.join(JOBS_FOLDER, "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("RESUME_MATCHER_JOB_WORKERS", 2))
+# Seconds an idle worker waits before looking for a new job.
+POLL_INTERVAL = 1.0
+# Seconds a worker waits for a claimed job's credentials to arrive from the pool.
+CREDENTIALS_TIMEOUT = 2.0
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+
+def job_folder(job_id):
+    """Folder holding a job's inputs, checkpoint and results."""
+    return os.path.join(JOBS_FOLDER, job_id)
+
+
+class JobQueue:
+    """
+    Matching jobs persisted in SQLite, shared by the UI and worker processes.
+
+    A job records its owner, parameters (JSON, never credentials), status, progress and
+    a cancellation flag. Workers claim jobs fairly: the owner with the fewest running
+    jobs goes first, ties go to the owner served least recently, then to the oldest
+    job, so one recruiter's large batches can't starve everyone else.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id               TEXT PRIMARY KEY,
+                owner            TEXT NOT NULL,
+                status           TEXT NOT NULL,
+                params           TEXT NOT NULL,
+                done             INTEGER NOT NULL DEFAULT 0,
+                total            INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                error            TEXT,
+                worker_pid       INTEGER,
+                created_at       REAL NOT NULL,
+                started_at       REAL,
+                updated_at       REAL NOT NULL,
+                finished_at      REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, owner)")
+
+    def submit(self, owner, params, job_id=None):
+        """Queue a job and return its id. `params` must be JSON serialisable."""
+        job_id = job_id or new_job_id()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, owner, status, params, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, owner, json.dumps(params), now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, owner=None, limit=50):
+        """Most recent jobs first, optionally for one owner."""
+        query = "SELECT * FROM jobs" + (" WHERE owner = ?" if owner is not None else "")
+        args = (owner,) if owner is not None else ()
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: a queued job is cancelled at once, a running one is flagged and
+        stops at its next progress update. Returns False if the job already finished.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ?, finished_at = ? WHERE id = ? AND status = 'queued'",
+                (now, now, job_id),
+            )
+            if cursor.rowcount:
+                return True
+            cursor = self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'running'",
+                (now, job_id),
+            )
+            return bool(cursor.rowcount)
+
+    def claim(self, worker_pid):
+        """Atomically move the next job (see class docstring) to running. Returns it, or None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    SELECT id FROM jobs AS queued
+                    WHERE status = 'queued'
+                    ORDER BY
+                        (SELECT COUNT(*) FROM jobs WHERE owner = queued.owner AND status = 'running'),
+                        (SELECT COALESCE(MAX(started_at), 0) FROM jobs WHERE owner = queued.owner),
+                        created_at
+                    LIMIT 1
+                    """
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ?, updated_at = ? WHERE id = ?",
+                        (worker_pid, now, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def update_progress(self, job_id, done, total):
+        """Record progress. Returns True when the job has been asked to cancel."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET done = ?, total = ?, updated_at = ? WHERE id = ?", (done, total, time.time(), job_id)
+            )
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id, status, error=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (status, error, now, now, job_id),
+            )
+
+    def delete(self, job_id):
+        """Remove a finished job's row. Returns False if it is missing or still active."""
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE id = ? AND status IN ({placeholders})", (job_id, *FINISHED_STATUSES)
+            )
+        return bool(cursor.rowcount)
+
+    def requeue_orphans(self):
+        """
+        Put running jobs whose worker process no longer exists back in the queue (or
+        mark them cancelled if that was requested). Their checkpoint lets them resume.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, worker_pid, cancel_requested FROM jobs WHERE status = 'running'").fetchall()
+        requeued = 0
+        for row in rows:
+            if _pid_alive(row["worker_pid"]):
+                continue
+            if row["cancel_requested"]:
+                self.finish(row["id"], "cancelled")
+                continue
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker_pid = NULL, updated_at = ? WHERE id = ? AND status = 'running'",
+                    (time.time(), row["id"]),
+                )
+            requeued += 1
+        if requeued:
+            logger.warning(f"Requeued {requeued} job(s) left running by a stopped worker")
+        return requeued
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _as_sources(sources):
+    """JSON turns (zip path, member) sources into lists; turn them back."""
+    return {name: tuple(source) if isinstance(source, list) else source for name, source in sources.items()}
+
+
+def run_job(queue, job, aws_access_key, aws_secret_key, aws_region):
+    """
+    Run one claimed job and write its results to job_folder(job id): a ResultStore in
+    results/ appended as resumes complete, per-JD CSV reports, selected resumes, metrics
+    and run.json. Raises JobCancelled when the job is cancelled mid-run.
+    """
+    params = json.loads(job["params"])
+    out_dir = job_folder(job["id"])
+    jd_sources = _as_sources(params["jd_sources"])
+    resume_sources = _as_sources(params["resume_sources"])
+    options = dict(
+        max_concurrency=params["max_concurrency"],
+        min_match_score=params["min_match_score"],
+        skill_mode=params["skill_mode"],
+        two_stage=params.get("two_stage", False),
+        deduplicate=params.get("deduplicate", True),
+        # A requeued job resumes from what it had already analysed.
+        checkpoint_path=os.path.join(out_dir, "checkpoint.jsonl"),
+    )
+    # A requeued job reports every resume again, from its checkpoint.
+    store = ResultStore(os.path.join(out_dir, "results"))
+    store.clear()
+
+    if options["two_stage"] and params.get("shortlist_top_n"):
+        # Progress here counts analysed documents, as no results are known before both stages finish.
+        def progress(done, total):
+            if queue.update_progress(job["id"], done, total):
+                raise JobCancelled(job["id"])
+
+        run = run_matching(jd_sources, resume_sources, aws_access_key, aws_secret_key, aws_region,
+                           shortlist_top_n=params["shortlist_top_n"], progress=progress, **options)
+        # A cancel that arrives while the last documents finish still wins over writing results.
+        if queue.get(job["id"])["cancel_requested"]:
+            raise JobCancelled(job["id"])
+        store.add_reports(run["reports"])
+    else:
+        events = stream_matching(jd_sources, resume_sources, aws_access_key, aws_secret_key, aws_region, **options)
+        try:
+            for event in events:
+                if event["event"] == "parsed":
+                    cancelled = queue.update_progress(job["id"], 0, event["total"])
+                elif event["event"] == "result":
+                    for jd_name, result in event["results"].items():
+                        store.append(jd_name, [result])
+                    cancelled = queue.update_progress(job["id"], event["done"], event["total"])
+                else:
+                    run = event["run"]
+                    cancelled = False
+                if cancelled:
+                    raise JobCancelled(job["id"])
+        finally:
+            events.close()
+        store.flush()
+
+    write_reports(run, out_dir, ("csv",))
+    export_selected(run, resume_sources, os.path.join(out_dir, "selected_profile"))
+    get_metrics().write(out_dir)
+    summary = {
+        "jds": list(run["reports"]),
+        "selected": run["selected"],
+        "parsed": [{key: value for key, value in doc.items() if key != "text"} for doc in run["parsed"]],
+        "duration": run["duration"],
+    }
+    with open(os.path.join(out_dir, "run.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    matched = len(next(iter(run["reports"].values()), []))
+    queue.update_progress(job["id"], matched, matched)
+
+
+def load_job_results(job_id):
+    """
+    Summary of a finished job, shaped like a run_matching result without its reports
+    ("jds", "selected", "parsed", "duration", "metrics") plus "metrics_prometheus"
+    (metrics.prom), "results_folder", its ResultStore, and "selected_folder", where its
+    selected resumes were exported.
+    """
+    out_dir = job_folder(job_id)
+    with open(os.path.join(out_dir, "run.json"), "r", encoding="utf-8") as f:
+        run = json.load(f)
+    run["results_folder"] = os.path.join(out_dir, "results")
+    if not os.path.isdir(run["results_folder"]):
+        # Jobs finished before the result store kept their reports as JSON only.
+        reports = {}
+        for jd_name in run["jds"]:
+            with open(os.path.join(out_dir, f"{jd_name}_report.json"), "r", encoding="utf-8") as f:
+                reports[jd_name] = json.load(f)["results"]
+        ResultStore(run["results_folder"]).add_reports(reports)
+    with open(os.path.join(out_dir, "metrics.json"), "r", encoding="utf-8") as f:
+        run["metrics"] = json.load(f)
+    with open(os.path.join(out_dir, "metrics.prom"), "r", encoding="utf-8") as f:
+        run["metrics_prometheus"] = f.read()
+    run["selected_folder"] = os.path.join(out_dir, "selected_profile")
+    return run
+
+
+def delete_job(queue, job_id):
+    """Remove a finished job and its files."""
+    if not queue.delete(job_id):
+        return False
+    shutil.rmtree(job_folder(job_id), ignore_errors=True)
+    return True
+
+
+class _Credentials:
+    """
+    Job id -> (access key, secret key, region), read line by line from the pool over
+    stdin. End of input means the pool has gone away, and sets `stop_event`.
+    """
+
+    def __init__(self, stream, stop_event):
+        self._credentials = {}
+        self._condition = threading.Condition()
+        threading.Thread(target=self._read, args=(stream, stop_event), daemon=True).start()
+
+    def _read(self, stream, stop_event):
+        for line in stream:
+            message = json.loads(line)
+            with self._condition:
+                self._credentials[message["job"]] = tuple(message["credentials"])
+                self._condition.notify_all()
+        stop_event.set()
+
+    def pop(self, job_id, timeout=CREDENTIALS_TIMEOUT):
+        """
+        Credentials for a job, or None. The pool sends them before queueing the job,
+        so they are at most a pipe read away; jobs requeued after a restart have none.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: job_id in self._credentials, timeout)
+            return self._credentials.pop(job_id, None)
+
+    def prune(self, queue):
+        """Forget credentials of jobs another worker has finished."""
+        with self._condition:
+            job_ids = list(self._credentials)
+        for job_id in job_ids:
+            job = queue.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                with self._condition:
+                    self._credentials.pop(job_id, None)
+
+
+def run_worker(path=JOBS_DB_PATH, workers=1, read_credentials=True):
+    """
+    Worker loop: claim and run jobs until stdin closes (or forever, without `read_credentials`).
+
+    Credentials arrive from the WorkerPool over stdin and are only held in memory, so
+    AWS secrets never reach the jobs database. Jobs without any (e.g. requeued after
+    a restart) fall back to AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY / AWS_REGION.
+    Each of the `workers` processes takes an equal share of the Bedrock quota.
+    """
+    for model_id in (SKILL_MODEL_ID, EMBEDDING_MODEL_ID):
+        limits = MODEL_LIMITS.get(model_id, MODEL_LIMITS["default"])
+        configure_model_limits(model_id, requests_per_second=limits["requests_per_second"] / workers,
+                               tokens_per_minute=limits["tokens_per_minute"] / workers)
+    stop_event = threading.Event()
+    credentials = _Credentials(sys.stdin, stop_event) if read_credentials else None
+    queue = JobQueue(path)
+    while not stop_event.is_set():
+        job = queue.claim(os.getpid())
+        if job is None:
+            if credentials is not None:
+                credentials.prune(queue)
+            stop_event.wait(POLL_INTERVAL)
+            continue
+
+        job_credentials = (credentials.pop(job["id"]) if credentials is not None else None) or (
+            os.getenv("AWS_ACCESS_KEY_ID"), os.getenv("AWS_SECRET_ACCESS_KEY"), os.getenv("AWS_REGION", "us-east-1")
+        )
+        logger.info(f"Worker {os.getpid()} running job {job['id']} for {job['owner']}")
+        try:
+            if not (job_credentials[0] and job_credentials[1]):
+                raise RuntimeError("AWS credentials for this job are no longer available; please resubmit it.")
+            run_job(queue, job, *job_credentials)
+            queue.finish(job["id"], "done")
+        except JobCancelled:
+            logger.info(f"Job {job['id']} cancelled")
+            queue.finish(job["id"], "cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job['id']} failed")
+            queue.finish(job["id"], "failed", str(e))
+    queue.close()
+
+
+class WorkerPool:
+    """
+    Worker processes (`python -m src.jobs`) running queued jobs for the UI process.
+
+    Workers are separate interpreters rather than multiprocessing children, so they
+    never re-run the Streamlit script or inherit its boto3 clients. Each job's
+    credentials are written to every worker's stdin; closing stdin stops them.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, path=JOBS_DB_PATH):
+        self.workers = workers
+        self.path = path
+        self.queue = JobQueue(path)
+        self._lock = threading.Lock()
+        self._processes = []
+        self._start_workers()
+        atexit.register(self.stop)
+
+    def _start_workers(self):
+        """Replace workers that have exited, first requeueing the jobs they left running."""
+        alive = [process for process in self._processes if process.poll() is None]
+        if self._processes and len(alive) == self.workers:
+            return
+        self.queue.requeue_orphans()
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.getenv("PYTHONPATH")])))
+        while len(alive) < self.workers:
+            alive.append(subprocess.Popen(
+                [sys.executable, "-m", "src.jobs", "--workers", str(self.workers), "--db", self.path],
+                stdin=subprocess.PIPE, env=env, text=True
+            ))
+        self._processes = alive
+
+    def submit(self, owner, params, aws_access_key, aws_secret_key, aws_region, job_id=None):
+        """Queue a job with its credentials. Returns the job id."""
+        job_id = job_id or new_job_id()
+        message = json.dumps({"job": job_id, "credentials": [aws_access_key, aws_secret_key, aws_region]}) + "\n"
+        with self._lock:
+            self._start_workers()
+            # Credentials first, so a worker claiming the job straight away finds them.
+            for process in self._processes:
+                try:
+                    process.stdin.write(message)
+                    process.stdin.flush()
+                except OSError:
+                    logger.warning(f"Job worker {process.pid} is not accepting jobs")
+        return self.queue.submit(owner, params, job_id)
+
+    def stop(self, timeout=10):
+        """Stop the workers after their current job; terminate any still busy after `timeout`."""
+        with self._lock:
+            for process in self._processes:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+            for process in self._processes:
+                try:
+                    process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    process.terminate()
+            self._processes = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background matching jobs from the jobs database.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes sharing the Bedrock quota (each takes 1/N).")
+    parser.add_argument("--db", default=JOBS_DB_PATH, help="Jobs database path.")
+    parser.add_argument("--env-credentials", action="store_true",
+                        help="Don't read job credentials from stdin; use the AWS_* environment variables.")
+    args = parser.parse_args(argv)
+    # The UI process and every worker would otherwise rotate the same log file.
+    use_process_log_file()
+    run_worker(args.db, args.workers, read_credentials=not args.env_credentials)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,63 @@
 import os
 import logging
+from logging.handlers import RotatingFileHandler
+
+LOG_PATH = "logs/resume_matcher.log"
+# Rotate at 10 MB, keeping 5 old files, instead of truncating on every start.
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+class ProcessRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler written to by one process only. Rotation is not safe across
+    processes, so a forked child (e.g. a parse worker) that logs through an inherited
+    handler switches to its own file, logs/resume_matcher.<pid>.log, on its first record.
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+        self._shared_path = self.baseFilename
+        self._pid = os.getpid()
+
+    def use_process_file(self):
+        """Log to this process's own <name>.<pid>.log from now on."""
+        self.acquire()
+        try:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            stem, ext = os.path.splitext(self._shared_path)
+            self.baseFilename = f"{stem}.{os.getpid()}{ext}"
+            self._pid = os.getpid()
+        finally:
+            self.release()
+
+    def emit(self, record):
+        if os.getpid() != self._pid:
+            self.use_process_file()
+        super().emit(record)
+
+
+def use_process_log_file():
+    """
+    Send this process's logs to logs/resume_matcher.<pid>.log, for processes started
+    alongside the UI (job workers) that would otherwise rotate the shared log file.
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, ProcessRotatingFileHandler):
+            handler.use_process_file()
+
 
 # Ensure logs directory exists
-os.makedirs("logs", exist_ok=True)
+os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 
 # Configure logger
 logging.basicConfig(
-    filename="logs/resume_matcher.log",
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(message)s",
-    filemode="w"
+    handlers=[ProcessRotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                         encoding="utf-8")]
 )
 
 logger = logging.getLogger("resume_matcher")
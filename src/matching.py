@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from src.embeddings import generate_embeddings
 
 def calculate_similarity(resume_text, job_text, aws_access_key, aws_secret_key, aws_region):
@@ -13,3 +12,29 @@ def calculate_similarity(resume_text, job_text, aws_access_key, aws_secret_key,
         np.linalg.norm(resume_embedding) * np.linalg.norm(job_embedding)
     )
     return float(similarity[0][0])
+
+
+def cosine_similarity_matrix(jd_embeddings, resume_embeddings):
+    """
+    Cosine similarity of every JD against every resume.
+
+    Args:
+        jd_embeddings: N x D array-like of JD embeddings.
+        resume_embeddings: M x D array-like of resume embeddings.
+
+    Returns:
+        np.ndarray: N x M matrix of cosine similarities, computed with one matmul
+        over L2-normalised rows. Zero vectors score 0 against everything.
+    """
+    jd_matrix = _normalise_rows(jd_embeddings)
+    resume_matrix = _normalise_rows(resume_embeddings)
+    return jd_matrix @ resume_matrix.T
+
+
+def _normalise_rows(embeddings):
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,213 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from src.cache import get_cache
+
+# Prefix for every exported Prometheus metric.
+METRIC_PREFIX = "resume_matcher"
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _label_text(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _timing_stats(samples):
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "count": int(values.size),
+        "total": round(float(values.sum()), 4),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+class Metrics:
+    """
+    Thread-safe counters and timers for one matching run.
+
+    Counters and timers are identified by a name plus keyword labels, e.g.
+    `incr("bedrock_calls", model=...)` or `with timer("stage_seconds", stage="parse")`.
+    Each run gets its own instance (see new_run_metrics), so concurrent runs in one
+    process keep separate numbers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._timers = {}
+            self._started = time.time()
+            # Cache stats are cumulative per process; the run reports the difference.
+            self._cache_baseline = get_cache().stats()
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._timers.setdefault(key, []).append(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _cache_stats(self):
+        stats = {}
+        for namespace, counters in get_cache().stats().items():
+            baseline = self._cache_baseline.get(namespace, {})
+            hits = counters["hits"] - baseline.get("hits", 0)
+            misses = counters["misses"] - baseline.get("misses", 0)
+            total = hits + misses
+            stats[namespace] = {"hits": hits, "misses": misses,
+                                "hit_ratio": round(hits / total, 4) if total else 0.0}
+        return stats
+
+    def summary(self):
+        """
+        Run summary.
+
+        Returns:
+            dict: "duration" (seconds since reset), "stages" (stage -> wall seconds),
+            "documents" (stage -> per-document latency stats), "bedrock" (model ->
+            calls, retries, errors, tokens and call latency), "documents_by_status",
+            "tokens" (estimated model input tokens of the parsed documents before and after
+            preprocessing) and "cache" (namespace -> hits, misses, hit ratio for this run).
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {key: list(samples) for key, samples in self._timers.items()}
+            started = self._started
+
+        stages, documents, bedrock, statuses, tokens = {}, {}, {}, {}, {}
+        for (name, labels), samples in timers.items():
+            label = dict(labels)
+            if name == "stage_seconds":
+                stages[label["stage"]] = round(sum(samples), 4)
+            elif name == "document_seconds":
+                documents[label["stage"]] = _timing_stats(samples)
+            elif name == "bedrock_call_seconds":
+                bedrock.setdefault(label["model"], {})["latency"] = _timing_stats(samples)
+
+        for (name, labels), value in counters.items():
+            label = dict(labels)
+            if name == "documents":
+                statuses[label["status"]] = statuses.get(label["status"], 0) + value
+            elif name == "document_tokens":
+                tokens[label["kind"]] = value
+            elif name.startswith("bedrock_"):
+                entry = bedrock.setdefault(label["model"], {})
+                field = name[len("bedrock_"):]
+                entry[field] = entry.get(field, 0) + value
+
+        return {
+            "started_at": round(started, 3),
+            "duration": round(time.time() - started, 4),
+            "stages": stages,
+            "documents": documents,
+            "documents_by_status": statuses,
+            "tokens": tokens,
+            "bedrock": bedrock,
+            "cache": self._cache_stats(),
+        }
+
+    def to_prometheus(self):
+        """Every counter, timer and cache ratio in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {key: list(samples) for key, samples in self._timers.items()}
+
+        lines = []
+        for metric in sorted({name for name, _ in counters}):
+            full_name = f"{METRIC_PREFIX}_{metric}_total"
+            lines.append(f"# TYPE {full_name} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{full_name}{_label_text(labels)} {value}")
+
+        for metric in sorted({name for name, _ in timers}):
+            full_name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# TYPE {full_name} summary")
+            for (name, labels), samples in sorted(timers.items()):
+                if name != metric:
+                    continue
+                for quantile in (0.5, 0.95):
+                    value = float(np.percentile(samples, quantile * 100))
+                    lines.append(f"{full_name}{_label_text(labels, [('quantile', str(quantile))])} {value:.6f}")
+                lines.append(f"{full_name}_sum{_label_text(labels)} {sum(samples):.6f}")
+                lines.append(f"{full_name}_count{_label_text(labels)} {len(samples)}")
+
+        full_name = f"{METRIC_PREFIX}_cache_hit_ratio"
+        lines.append(f"# TYPE {full_name} gauge")
+        for namespace, stats in sorted(self._cache_stats().items()):
+            lines.append(f"{full_name}{_label_text([('namespace', namespace)])} {stats['hit_ratio']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir):
+        """
+        Write metrics.json (run summary) and metrics.prom (Prometheus text format) to `output_dir`.
+
+        Returns:
+            List[str]: Paths written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, "metrics.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        prom_path = os.path.join(output_dir, "metrics.prom")
+        # Write-then-rename so a node_exporter textfile collector never reads a partial file.
+        with open(prom_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        return [json_path, prom_path]
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+# The Metrics of the run executing in this context. Worker threads don't inherit
+# context variables, so thread pools submit work through contextvars.copy_context().
+_run_metrics = contextvars.ContextVar("run_metrics", default=None)
+
+
+def new_run_metrics():
+    """Start a fresh Metrics for the run executing in the current context and return it."""
+    metrics = Metrics()
+    _run_metrics.set(metrics)
+    return metrics
+
+
+def get_metrics():
+    """Metrics of the current run (see new_run_metrics), or the process-wide registry outside a run."""
+    metrics = _run_metrics.get()
+    if metrics is not None:
+        return metrics
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
@@ -1,12 +1,78 @@
-import pdfplumber
-import docx
 import os
+import time
+import multiprocessing
+from src.cache import cache_key, file_hash, get_cache, stream_hash
+from src.ingest import ZipLimitError, open_source, source_name
+
+# Bump whenever extraction logic changes, to invalidate cached parse results.
+PARSER_VERSION = "1"
+
+# Per-file limits for batch parsing. A PDF is cut off after MAX_PDF_PAGES pages or
+# once PARSE_TIMEOUT seconds have elapsed, whichever comes first.
+MAX_PDF_PAGES = 50
+PARSE_TIMEOUT = 30
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+DOCUMENT_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+
+def _cached_parse(file_path, extractor):
+    """Run `extractor` on a file, caching non-empty text by file content hash."""
+    try:
+        key = cache_key(file_hash(file_path), extractor.__name__, PARSER_VERSION)
+    except OSError:
+        return extractor(file_path)
+    cache = get_cache()
+    text = cache.get("parse", key)
+    if text is None:
+        text = extractor(file_path)
+        # Failed extractions return "", don't pin those in the cache.
+        if text:
+            cache.set("parse", key, text)
+    return text
+
+
+def _extract_pdf_pages(pdf_path, max_pages=None, deadline=None):
+    """
+    Extract PDF text page by page, calling extract_text() once per page.
+
+    Returns:
+        Tuple[str, str, int]: (text, status, pages read) where status is "ok",
+        "truncated" (page limit hit) or "timeout" (deadline passed).
+    """
+    import pdfplumber  # Deferred: only needed on a parse cache miss.
+
+    status = "ok"
+    texts = []
+    pages_read = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number, page in enumerate(pdf.pages):
+            if max_pages is not None and page_number >= max_pages:
+                status = "truncated"
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                status = "timeout"
+                break
+            page_text = page.extract_text()
+            pages_read += 1
+            if page_text:
+                texts.append(page_text)
+            # Drop pdfminer's per-page layout objects as we go.
+            page.flush_cache()
+    return "\n".join(texts), status, pages_read
+
+
+def _read_docx(docx_source):
+    import docx  # Deferred: only needed on a parse cache miss.
+
+    doc = docx.Document(docx_source)
+    return "\n".join([para.text for para in doc.paragraphs])
+
 
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF file."""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            return "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
+        return _extract_pdf_pages(pdf_path)[0]
     except Exception as e:
         print(f"⚠️ Failed to extract text from PDF: {pdf_path} — {e}")
         return ""
@@ -14,8 +80,7 @@ def extract_text_from_pdf(pdf_path):
 def extract_text_from_docx(docx_path):
     """Extract text from a DOCX file."""
     try:
-        doc = docx.Document(docx_path)
-        return "\n".join([para.text for para in doc.paragraphs])
+        return _read_docx(docx_path)
     except Exception as e:
         print(f"⚠️ Failed to extract text from DOCX: {docx_path} — {e}")
         return ""
@@ -38,9 +103,9 @@ def extract_text_from_file(file_path):
     if ext == ".txt":
         return extract_text_from_txt(file_path)
     elif ext == ".pdf":
-        return extract_text_from_pdf(file_path)
+        return _cached_parse(file_path, extract_text_from_pdf)
     elif ext == ".docx":
-        return extract_text_from_docx(file_path)
+        return _cached_parse(file_path, extract_text_from_docx)
     else:
         print(f"⚠️ Unsupported job description file format: {file_path}")
         return ""
@@ -50,9 +115,122 @@ def parse_resume(file_path):
     _, ext = os.path.splitext(file_path)
     ext = ext.lower()
     if ext == ".pdf":
-        return extract_text_from_pdf(file_path)
+        return _cached_parse(file_path, extract_text_from_pdf)
     elif ext == ".docx":
-        return extract_text_from_docx(file_path)
+        return _cached_parse(file_path, extract_text_from_docx)
     else:
         print(f"⚠️ Unsupported resume file format: {file_path}")
         return ""
+
+
+_EXTRACTORS = {
+    ".pdf": extract_text_from_pdf,
+    ".docx": extract_text_from_docx,
+    ".txt": extract_text_from_txt,
+}
+
+
+def _parse_result(name, source, text="", status="ok", pages=None, duration=0.0):
+    return {
+        "name": name,
+        "source": source,
+        "text": text,
+        "status": status,
+        "pages": pages,
+        "duration": duration,
+    }
+
+
+def _parse_one(name, source, max_pages, timeout):
+    """
+    Parse a single document source with limits, through the parse cache.
+    Runs inside a worker process; zip members are streamed from the archive.
+    """
+    start = time.monotonic()
+    ext = os.path.splitext(name)[1].lower()
+    text, status, pages = "", "ok", None
+    try:
+        with open_source(source) as stream:
+            key = cache_key(stream_hash(stream), _EXTRACTORS[ext].__name__, PARSER_VERSION)
+            cached = get_cache().get("parse", key)
+            if cached is not None:
+                return _parse_result(name, source, cached, "cached", None, round(time.monotonic() - start, 3))
+            stream.seek(0)
+            if ext == ".pdf":
+                text, status, pages = _extract_pdf_pages(stream, max_pages, start + timeout)
+            elif ext == ".docx":
+                text = _read_docx(stream)
+            else:
+                text = stream.read().decode("utf-8", errors="ignore")
+    except ZipLimitError as e:
+        print(f"⚠️ Rejected {name} — {e}")
+        status = "rejected"
+    except Exception as e:
+        print(f"⚠️ Failed to extract text from {name} — {e}")
+        status = "error"
+    if status == "ok":
+        if text.strip():
+            get_cache().set("parse", key, text)
+        else:
+            status = "empty"
+    return _parse_result(name, source, text, status, pages, round(time.monotonic() - start, 3))
+
+
+def parse_documents(sources, allowed_ext=RESUME_EXTENSIONS, max_workers=None,
+                    max_pages=MAX_PDF_PAGES, timeout=PARSE_TIMEOUT):
+    """
+    Parse many documents on a process pool.
+
+    pdfplumber is pure Python and CPU-bound, so documents are spread over processes
+    rather than threads. Each PDF stops after `max_pages` pages or `timeout` seconds; a
+    worker stuck inside a single page is abandoned after twice the timeout and the pool
+    is terminated at the end of the batch. Documents already in the parse cache are
+    not re-parsed.
+
+    Args:
+        sources: Dict of name -> source, or a list of sources named by `source_name`.
+            A source is a file path or a (zip path, member name) pair; ZIP members are
+            inflated straight into the parser without being extracted to disk.
+
+    Returns:
+        List[dict]: One result per source, in input order, with keys name, source,
+        text, status ("ok", "cached", "empty", "truncated", "timeout", "error",
+        "rejected", "unsupported"), pages and duration (seconds).
+    """
+    if not isinstance(sources, dict):
+        sources = {source_name(source): source for source in sources}
+    items = list(sources.items())
+    results = [None] * len(items)
+    pending = []
+
+    for i, (name, source) in enumerate(items):
+        ext = os.path.splitext(name)[1].lower()
+        if ext not in allowed_ext or ext not in _EXTRACTORS:
+            print(f"⚠️ Unsupported file format: {name}")
+            results[i] = _parse_result(name, source, status="unsupported")
+        else:
+            pending.append(i)
+
+    workers = min(max_workers or os.cpu_count() or 1, len(pending))
+    if workers <= 1:
+        for i in pending:
+            results[i] = _parse_one(*items[i], max_pages, timeout)
+    elif pending:
+        pool = multiprocessing.Pool(processes=workers)
+        hung = False
+        try:
+            handles = {i: pool.apply_async(_parse_one, (*items[i], max_pages, timeout)) for i in pending}
+            for i, handle in handles.items():
+                try:
+                    results[i] = handle.get(timeout=timeout * 2)
+                except multiprocessing.TimeoutError:
+                    hung = True
+                    print(f"⚠️ Timed out parsing {items[i][0]}")
+                    results[i] = _parse_result(*items[i], status="timeout", duration=float(timeout * 2))
+        finally:
+            if hung:
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+    return results
@@ -0,0 +1,217 @@
+import re
+from functools import lru_cache
+from src.bedrock_client import estimate_tokens
+
+# Bump whenever the reduction below changes, so checkpoints recorded with the old text are not reused.
+PREPROCESS_VERSION = "1"
+
+# Estimated input tokens per call. Claude v2 accepts far more, but skills are found in the
+# first few pages of sections kept below; Titan G1 accepts 8k tokens, and estimate_tokens
+# can undercount dense technical text, so embeddings stay well under it.
+SKILL_TOKEN_BUDGET = 4000
+EMBEDDING_TOKEN_BUDGET = 6000
+# Longer documents are embedded as up to this many chunks and mean-pooled.
+MAX_EMBEDDING_CHUNKS = 4
+
+# Kept first when a document is over budget (lower first); ties keep document order.
+SECTION_PRIORITY = {
+    "skills": 0,
+    "experience": 1,
+    "projects": 1,
+    "certifications": 2,
+    "summary": 3,
+    "education": 3,
+    "other": 3,
+    "extras": 4,
+}
+# Never sent to a model.
+DROPPED_SECTIONS = {"dropped"}
+
+_SECTION_HEADINGS = {
+    "skills": [
+        "skills", "technical skills", "key skills", "core skills", "skill set", "skillset", "core competencies",
+        "competencies", "technologies", "technical expertise", "tech stack", "tools", "tools and technologies",
+        "programming languages", "requirements", "required skills", "qualifications", "preferred qualifications",
+        "must have", "nice to have",
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "relevant experience", "employment",
+        "employment history", "work history", "career history", "responsibilities", "key responsibilities",
+        "what you will do",
+    ],
+    "projects": ["projects", "key projects", "personal projects", "academic projects", "selected projects"],
+    "certifications": [
+        "certifications", "certificates", "licenses and certifications", "courses", "training",
+    ],
+    "summary": [
+        "summary", "profile", "professional summary", "career summary", "objective", "career objective",
+        "about me", "about the role", "overview", "job description", "role overview",
+    ],
+    "education": ["education", "academic background", "academic qualifications"],
+    "extras": [
+        "awards", "achievements", "honors", "honours", "publications", "volunteering", "volunteer experience",
+        "extracurricular activities", "languages", "about us", "about the company",
+    ],
+    "dropped": [
+        "references", "referees", "hobbies", "interests", "hobbies and interests", "personal details",
+        "personal information", "declaration", "benefits", "perks", "what we offer", "equal opportunity",
+        "equal opportunity employer",
+    ],
+}
+_HEADING_KIND = {heading: kind for kind, headings in _SECTION_HEADINGS.items() for heading in headings}
+_HEADING = re.compile(
+    r"^[\W_]*(" + "|".join(sorted((re.escape(h) for h in _HEADING_KIND), key=len, reverse=True)) + r")"
+    r"\s*(?:[:\-–—|]\s*(.*))?$",
+    re.IGNORECASE,
+)
+_BOILERPLATE = re.compile(
+    r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|[-–—]?\s*\d{1,3}\s*[-–—]?|"
+    r"curriculum vitae|resume|résumé|cv|references available (?:up)?on request\.?)$",
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r"^[•●▪■◦‣∙·*➢➤►o]\s+")
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+_MAX_HEADING_LENGTH = 40
+
+
+def clean_text(text):
+    """
+    Normalise whitespace and strip boilerplate: page numbers, "Curriculum Vitae" titles,
+    blank line runs, bullet glyphs, and lines repeated verbatim (page headers and footers).
+    """
+    lines, seen = [], set()
+    for line in text.replace("\r", "\n").replace("\f", "\n").split("\n"):
+        line = _BULLET.sub("- ", _SPACES.sub(" ", line).strip())
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if _BOILERPLATE.match(line):
+            continue
+        key = line.lower()
+        if key in seen and not _is_heading(line):
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def _is_heading(line):
+    return len(line) <= _MAX_HEADING_LENGTH and _HEADING.match(line) is not None
+
+
+def split_sections(text):
+    """
+    Split cleaned text into sections at recognised headings ("Skills", "Work Experience:",
+    "Hobbies & Interests" ...). Text before the first heading is "other".
+
+    Returns:
+        List[Tuple[str, List[str]]]: (kind, lines) per section, in document order.
+    """
+    sections = [("other", [])]
+    for line in text.split("\n"):
+        match = _HEADING.match(line.replace("&", "and"))
+        # "Skills: Python, Go" starts a section with content on the heading line.
+        if match and (len(line) <= _MAX_HEADING_LENGTH or match.group(2)):
+            sections.append((_HEADING_KIND[match.group(1).lower()], [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(kind, lines) for kind, lines in sections if any(lines)]
+
+
+def reduce_text(text, max_tokens):
+    """
+    Cleaned text without dropped sections (references, hobbies ...), cut to `max_tokens`
+    by keeping whole sections in SECTION_PRIORITY order and truncating the first one
+    that does not fit. Kept sections stay in document order. Text that is all boilerplate
+    is returned stripped and cut to the budget rather than emptied.
+    """
+    sections = split_sections(clean_text(text))
+    kept = [section for section in sections if section[0] not in DROPPED_SECTIONS]
+    if not kept:
+        # Nothing but dropped sections (e.g. a lone "Hobbies" heading misread): keep them as plain text.
+        kept = [("other", lines) for _, lines in sections]
+    reduced = _join(kept)
+    if not reduced:
+        return text.strip()[:max_tokens * 4]
+    if estimate_tokens(reduced) <= max_tokens:
+        return reduced
+
+    # estimate_tokens counts characters / 4; budget in characters, "\n" separators included.
+    budget = max_tokens * 4
+    allotted = [[] for _ in kept]
+    for i in sorted(range(len(kept)), key=lambda i: SECTION_PRIORITY[kept[i][0]]):
+        for line in kept[i][1]:
+            if len(line) + 1 > budget:
+                # Cut the first line that doesn't fit, so one long paragraph can't empty the result.
+                if budget > 1:
+                    allotted[i].append(line[:budget - 1])
+                budget = 0
+                break
+            allotted[i].append(line)
+            budget -= len(line) + 1
+        if budget <= 0:
+            break
+    return _join([(kind, lines) for (kind, _), lines in zip(kept, allotted) if lines])
+
+
+def _join(sections):
+    return "\n".join(line for _, lines in sections for line in lines).strip()
+
+
+def chunk_text(text, max_tokens=EMBEDDING_TOKEN_BUDGET, max_chunks=MAX_EMBEDDING_CHUNKS):
+    """
+    Reduce text to `max_tokens * max_chunks` and split it at line boundaries into chunks
+    of at most `max_tokens` (single lines longer than that are cut).
+
+    Returns:
+        List[str]: One chunk when the reduced text fits a single call.
+    """
+    reduced = reduce_text(text, max_tokens * max_chunks)
+    if estimate_tokens(reduced) <= max_tokens:
+        return [reduced]
+    max_chars = max_tokens * 4
+    chunks, current, size = [], [], 0
+    for line in reduced.split("\n"):
+        for start in range(0, max(len(line), 1), max_chars):
+            piece = line[start:start + max_chars]
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()][:max_chunks]
+
+
+@lru_cache(maxsize=256)
+def prepare_document(text):
+    """
+    Model inputs for one document, memoised as each document is prepared by both
+    analysis calls and the run's token report.
+
+    Returns:
+        dict: "skills_text" (Claude prompt text), "embedding_chunks" (Titan inputs) and
+        the estimated "original_tokens", "skill_tokens", "embedding_tokens" and
+        "tokens_saved" across both models.
+    """
+    skills_text = reduce_text(text, SKILL_TOKEN_BUDGET)
+    chunks = chunk_text(text)
+    original = estimate_tokens(text)
+    skill_tokens = estimate_tokens(skills_text)
+    embedding_tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+    return {
+        "skills_text": skills_text,
+        "embedding_chunks": chunks,
+        "original_tokens": original,
+        "skill_tokens": skill_tokens,
+        "embedding_tokens": embedding_tokens,
+        "tokens_saved": max(0, 2 * original - skill_tokens - embedding_tokens),
+    }
+
+
+def token_report(text):
+    """Token counts of prepare_document without the texts, for per-document reporting."""
+    prepared = prepare_document(text)
+    return {key: value for key, value in prepared.items() if key.endswith("_tokens") or key == "tokens_saved"}
@@ -0,0 +1,140 @@
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is refused because its circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`.
+    `acquire` blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Take `amount` tokens (clamped to capacity), waiting as needed. Returns seconds waited."""
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent calls.
+
+    Each success raises the limit by 1/limit (about +1 per round of calls); a throttle
+    halves it. Throttles arriving within `cooldown` seconds of the last decrease are
+    treated as the same congestion event, so a burst of parallel 429s halves the limit
+    once rather than collapsing it to the minimum. Use as a context manager around a call.
+    """
+
+    def __init__(self, max_limit, min_limit=1, cooldown=1.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.cooldown = cooldown
+        self.limit = float(max_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._cond.notify()
+
+    def on_throttle(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(float(self.min_limit), self.limit / 2)
+                self._last_decrease = now
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After `failure_threshold` consecutive failures the breaker opens and `before_call`
+    raises CircuitOpenError for `reset_timeout` seconds; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise CircuitOpenError(f"Circuit open, retry in {max(remaining, 0):.0f}s")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_neutral(self):
+        """The call got an answer that says nothing about health (e.g. a throttle)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
@@ -1,42 +1,415 @@
 from src.bedrock_llm import run_skill_extraction_prompt
-from src.matching import calculate_similarity
+from src.embeddings import generate_document_embedding
+from src.matching import cosine_similarity_matrix
 from src.logger import logger
+from src.metrics import get_metrics
+from src.cache import cache_key, content_hash
+from src.dedup import find_duplicates
+from src.preprocess import PREPROCESS_VERSION, prepare_document
+from src.skill_extractor import extract_local_skills
+from src.skill_vocab import SkillVocabulary, overlap_counts, unpack_ids
+import contextvars
 import time
-from src.matching import calculate_similarity
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def extract_skills(text, aws_access_key, aws_secret_key, aws_region):
-    """Use Claude v2 LLM to extract technical skills."""
-    return run_skill_extraction_prompt(text, aws_access_key, aws_secret_key, aws_region)
+# Default number of documents processed concurrently. Each document issues its
+# Bedrock calls sequentially, so this is also the max number of in-flight requests.
+DEFAULT_MAX_CONCURRENCY = 8
 
+# Skill extraction modes: "llm" (Claude v2 on every document), "local" (taxonomy
+# matcher only, no Bedrock call) or "hybrid" (local first, Claude only when the
+# local matcher finds fewer than HYBRID_MIN_SKILLS skills).
+SKILL_MODES = ("llm", "local", "hybrid")
+DEFAULT_SKILL_MODE = "llm"
+HYBRID_MIN_SKILLS = 5
 
-def generate_match_report(resume_texts, job_text, aws_access_key, aws_secret_key, aws_region):
-    results = []
-    jd_skills = run_skill_extraction_prompt(job_text, aws_access_key, aws_secret_key, aws_region)
 
+def extract_skills(text, aws_access_key, aws_secret_key, aws_region, mode=DEFAULT_SKILL_MODE):
+    """
+    Extract technical skills with the local taxonomy matcher, Claude v2, or both (see SKILL_MODES).
+    Claude gets the document reduced to its token budget (see preprocess.prepare_document).
+    """
+    if mode == "llm":
+        return run_skill_extraction_prompt(prepare_document(text)["skills_text"], aws_access_key, aws_secret_key,
+                                           aws_region)
+    if mode not in SKILL_MODES:
+        raise ValueError(f"Unknown skill extraction mode: {mode}")
+
+    skills = extract_local_skills(text)
+    if mode == "hybrid" and len(skills) < HYBRID_MIN_SKILLS:
+        llm_skills = run_skill_extraction_prompt(prepare_document(text)["skills_text"], aws_access_key,
+                                                 aws_secret_key, aws_region)
+        skills = sorted(set(skills) | set(llm_skills))
+    return skills
+
+
+def _analyse_document(text, aws_access_key, aws_secret_key, aws_region, skill_mode=DEFAULT_SKILL_MODE):
+    """Skills and embedding for one document; the per-document work shared by every pairing."""
+    metrics = get_metrics()
+    with metrics.timer("document_seconds", stage="analyse"):
+        with metrics.timer("document_seconds", stage="skills"):
+            skills = extract_skills(text, aws_access_key, aws_secret_key, aws_region, skill_mode)
+        with metrics.timer("document_seconds", stage="embedding"):
+            embedding = generate_document_embedding(text, aws_access_key, aws_secret_key, aws_region)
+    return skills, embedding
+
+
+def _analyse_checkpointed(text, aws_access_key, aws_secret_key, aws_region, checkpoint=None,
+                          skill_mode=DEFAULT_SKILL_MODE):
+    """_analyse_document, served from and recorded to `checkpoint` when one is given."""
+    if checkpoint is None:
+        return _analyse_document(text, aws_access_key, aws_secret_key, aws_region, skill_mode)
+    key = cache_key(content_hash(text), skill_mode, PREPROCESS_VERSION)
+    result = checkpoint.get(key)
+    if result is None:
+        result = _analyse_document(text, aws_access_key, aws_secret_key, aws_region, skill_mode)
+        checkpoint.record(key, *result)
+    return result
+
+
+def analyse_documents(texts, aws_access_key, aws_secret_key, aws_region,
+                      max_concurrency=DEFAULT_MAX_CONCURRENCY, checkpoint=None, skill_mode=DEFAULT_SKILL_MODE,
+                      on_analysed=None):
+    """
+    Extract skills and embeddings for a list of texts on a bounded thread pool.
+
+    If a `Checkpoint` is given, documents it already holds are not re-analysed and
+    each newly analysed document is recorded as soon as it completes.
+    `on_analysed(count)`, if given, is called as documents finish (checkpoint hits
+    first, in one call); an exception it raises stops the batch and cancels the
+    documents not yet started.
+
+    Returns:
+        List[Tuple[List[str], List[float]]]: (skills, embedding) per text, in input order.
+    """
+    results = [None] * len(texts)
+    hashes = ([cache_key(content_hash(text), skill_mode, PREPROCESS_VERSION) for text in texts]
+              if checkpoint is not None else None)
+    pending = []
+    for i in range(len(texts)):
+        done = checkpoint.get(hashes[i]) if checkpoint is not None else None
+        if done is not None:
+            results[i] = done
+        else:
+            pending.append(i)
+    if on_analysed is not None and len(pending) < len(texts):
+        on_analysed(len(texts) - len(pending))
+    if not pending:
+        return results
+
+    def analyse(i):
+        return _analyse_checkpointed(texts[i], aws_access_key, aws_secret_key, aws_region, checkpoint, skill_mode)
+
+    workers = max(1, min(int(max_concurrency), len(pending)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match")
+    try:
+        # Each task runs in a copy of this context, so its Bedrock calls count towards this run's metrics.
+        futures = {executor.submit(contextvars.copy_context().run, analyse, i): i for i in pending}
+        # Results land at their input index, so completion order doesn't change reports.
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_analysed is not None:
+                on_analysed(1)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _non_empty_documents(job_texts, resume_texts):
+    """(name, text) lists of the JDs and resumes that have text, warning about the rest."""
+    jds = []
+    for jd_name, job_text in job_texts.items():
+        if not job_text.strip():
+            print(f"⚠️ Empty job description text for {jd_name}, skipping matching.")
+            continue
+        jds.append((jd_name, job_text))
+
+    resumes = []
     for resume_name, resume_text in resume_texts.items():
         if not resume_text.strip():
             print(f"⚠️ Empty text extracted from resume: {resume_name}, skipping.")
             continue
-        if not job_text.strip():
-            print(f"⚠️ Empty job description text, skipping matching.")
-            continue
+        resumes.append((resume_name, resume_text))
+    return jds, resumes
 
-        resume_skills = run_skill_extraction_prompt(resume_text, aws_access_key, aws_secret_key, aws_region)
-        matched_skills = list(set(jd_skills).intersection(set(resume_skills)))
-        missing_skills = list(set(jd_skills) - set(resume_skills))
 
-        embedding_score = round(
-            calculate_similarity(resume_text, job_text, aws_access_key, aws_secret_key, aws_region) * 100, 2
-        )
-        match_score = round(len(matched_skills) / len(jd_skills) * 100, 2) if jd_skills else 0.0
+def _match_result(resume_name, similarity, match_score, resume_skills, matched_skills, missing_skills,
+                  stage=2, duplicate_of=None):
+    return {
+        "resume": resume_name,
+        "embedding_score": round(float(similarity) * 100, 2),
+        "match_score": float(match_score),
+        "all_resume_skills": resume_skills,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "stage": stage,
+        "duplicate_of": duplicate_of
+    }
 
-        results.append({
-            "resume": resume_name,
-            "embedding_score": embedding_score,
-            "match_score": match_score,
-            "all_resume_skills": resume_skills,
-            "matched_skills": matched_skills,
-            "missing_skills": missing_skills
-        })
 
-    return results
+def _skill_overlap(vocab, jd_ids, resume_ids):
+    """
+    Skill overlap of every JD x resume pair: canonical ids -> packed bitsets -> AND +
+    popcount. The one scoring path for generate_match_matrix and iter_match_results.
+
+    Args:
+        jd_ids, resume_ids: Id lists from `vocab.encode`, interned before this call.
+
+    Returns:
+        Tuple[np.ndarray, Callable]: N x M skills match scores (% of the JD's skills the
+        resume has, 2 decimals) and pair_skills(jd_idx, resume_idx), which returns the
+        pair's (matched, missing) canonical skill names.
+    """
+    width = len(vocab)
+    jd_bits = vocab.bitsets(jd_ids, width)
+    resume_bits = vocab.bitsets(resume_ids, width)
+    matched_counts = overlap_counts(jd_bits, resume_bits)
+    jd_totals = np.array([len(ids) for ids in jd_ids], dtype=np.float64)
+    match_scores = np.divide(matched_counts * 100.0, jd_totals[:, None],
+                             out=np.zeros(matched_counts.shape), where=jd_totals[:, None] > 0).round(2)
+    jd_skill_names = [vocab.names(ids) for ids in jd_ids]
+
+    def pair_skills(jd_idx, resume_idx):
+        if not matched_counts[jd_idx, resume_idx]:
+            return [], jd_skill_names[jd_idx]
+        return (vocab.names(unpack_ids(jd_bits[jd_idx] & resume_bits[resume_idx])),
+                vocab.names(unpack_ids(jd_bits[jd_idx] & ~resume_bits[resume_idx])))
+
+    return match_scores, pair_skills
+
+
+def _shortlist(similarity, min_score=None, top_n=None):
+    """
+    Stage-1 shortlist per JD from the N x M similarity matrix: resumes at or above
+    `min_score` (%), capped to the `top_n` best. Returns an N x M boolean mask.
+    """
+    scores = similarity * 100
+    mask = np.ones(scores.shape, dtype=bool) if min_score is None else scores >= min_score
+    if top_n is not None and top_n < scores.shape[1]:
+        # Rank by score, then by input order, so ties are broken deterministically.
+        order = np.argsort(-scores, axis=1, kind="stable")
+        capped = np.zeros(scores.shape, dtype=bool)
+        np.put_along_axis(capped, order[:, :top_n], True, axis=1)
+        mask &= capped
+    return mask
+
+
+def generate_match_matrix(resume_texts, job_texts, aws_access_key, aws_secret_key, aws_region,
+                          max_concurrency=DEFAULT_MAX_CONCURRENCY, checkpoint=None, skill_mode=DEFAULT_SKILL_MODE,
+                          shortlist_min_score=None, shortlist_top_n=None, deduplicate=True, progress=None):
+    """
+    Match every resume against every job description.
+
+    Each document is analysed (skills + embedding) exactly once, then the N x M
+    cosine matrix is computed in a single matmul and skill overlap is scored for
+    all pairs in the same pass. Skills are compared by canonical id, so aliases
+    such as "nodejs" and "node.js" count as the same skill.
+
+    With `shortlist_min_score` and/or `shortlist_top_n` the ranking runs in two stages:
+    every resume is first scored on embedding similarity with local (taxonomy) skills,
+    and `skill_mode` extraction (the Claude call) only runs on resumes shortlisted for
+    at least one JD. Resumes not shortlisted for a JD keep their stage-1 result.
+
+    With `deduplicate`, exact and near-duplicate resumes (renamed copies, PDF and DOCX
+    versions of one CV, minor edits) are analysed once and the representative's
+    result is reported for every copy, with "duplicate_of" naming the representative.
+
+    Args:
+        resume_texts: Dict[str, str] of resume name -> text.
+        job_texts: Dict[str, str] of JD name -> text.
+        checkpoint: Optional `Checkpoint` used to skip documents analysed by an earlier run.
+        skill_mode: One of SKILL_MODES.
+        shortlist_min_score: Stage-1 embedding score (%) a resume needs to reach stage 2.
+        shortlist_top_n: At most this many resumes per JD reach stage 2.
+        deduplicate: Analyse each cluster of duplicate resumes once (see dedup.find_duplicates).
+        progress: Optional callable(done, total) over analysed documents, called before
+            analysis starts, as documents finish and between stages (stage 2 adds its
+            shortlisted resumes to the total). An exception it raises, such as a job's
+            cancellation, stops the run.
+
+    Returns:
+        Dict[str, List[dict]]: JD name -> per-resume results in resume input order;
+        "stage" is 2 for fully analysed pairs and 1 for resumes left at stage 1.
+    """
+    reports = {jd_name: [] for jd_name in job_texts}
+    jds, resumes = _non_empty_documents(job_texts, resume_texts)
+    if not jds or not resumes:
+        return reports
+
+    metrics = get_metrics()
+    start = time.perf_counter()
+    two_stage = skill_mode != "local" and (shortlist_min_score is not None or shortlist_top_n is not None)
+    jd_texts = [text for _, text in jds]
+    # Bedrock work runs per unique resume; rows fan back out to every copy below.
+    representative = find_duplicates([text for _, text in resumes]) if deduplicate else list(range(len(resumes)))
+    unique = sorted(set(representative))
+    position = {resume_idx: k for k, resume_idx in enumerate(unique)}
+    metrics.incr("duplicate_resumes", len(resumes) - len(unique))
+    resume_texts_list = [resumes[i][1] for i in unique]
+    done, total = 0, len(jds) + len(unique)
+    on_analysed = None
+    if progress is not None:
+        def on_analysed(count):
+            nonlocal done
+            done += count
+            progress(done, total)
+
+        progress(done, total)
+    with metrics.timer("stage_seconds", stage="analyse"):
+        if two_stage:
+            # Stage 1: embeddings + local skills for everything; JDs are few, so they get full extraction.
+            jd_analysis = analyse_documents(jd_texts, aws_access_key, aws_secret_key, aws_region,
+                                            max_concurrency, checkpoint, skill_mode, on_analysed)
+            resume_analysis = analyse_documents(resume_texts_list, aws_access_key, aws_secret_key, aws_region,
+                                                max_concurrency, checkpoint, "local", on_analysed)
+        else:
+            analysed = analyse_documents(jd_texts + resume_texts_list, aws_access_key, aws_secret_key,
+                                         aws_region, max_concurrency, checkpoint, skill_mode, on_analysed)
+            jd_analysis, resume_analysis = analysed[:len(jds)], analysed[len(jds):]
+
+    similarity = cosine_similarity_matrix(
+        [embedding for _, embedding in jd_analysis],
+        [embedding for _, embedding in resume_analysis]
+    )
+
+    shortlisted = np.ones(similarity.shape, dtype=bool)
+    stage_two_column = {}
+    if two_stage:
+        shortlisted = _shortlist(similarity, shortlist_min_score, shortlist_top_n)
+        promoted = np.flatnonzero(shortlisted.any(axis=0))
+        logger.info(f"Two-stage ranking: {len(promoted)} of {len(unique)} resumes shortlisted for {skill_mode} skills")
+        metrics.incr("shortlisted_resumes", len(promoted))
+        metrics.incr("prefiltered_resumes", len(unique) - len(promoted))
+        total += len(promoted)
+        if progress is not None:
+            progress(done, total)
+        # Stage 2: embeddings are served from the cache, so only skill extraction runs.
+        with metrics.timer("stage_seconds", stage="analyse"):
+            stage_two = analyse_documents([resume_texts_list[i] for i in promoted], aws_access_key, aws_secret_key,
+                                          aws_region, max_concurrency, checkpoint, skill_mode, on_analysed)
+        # Stage-2 analyses are scored as extra columns, so a resume shortlisted for one JD
+        # keeps its stage-1 skills and score for the others.
+        for i, analysis in zip(promoted, stage_two):
+            stage_two_column[i] = len(resume_analysis)
+            resume_analysis.append(analysis)
+    scoring_start = time.perf_counter()
+
+    # The vocabulary is built per run, so bitset width and memory follow this run's skills only.
+    vocab = SkillVocabulary()
+    jd_ids = [vocab.encode(skills) for skills, _ in jd_analysis]
+    resume_ids = [vocab.encode(skills) for skills, _ in resume_analysis]
+    match_scores, pair_skills = _skill_overlap(vocab, jd_ids, resume_ids)
+
+    resume_skill_names = [vocab.names(ids) for ids in resume_ids]
+    for jd_idx, (jd_name, _) in enumerate(jds):
+        for resume_idx, (resume_name, _) in enumerate(resumes):
+            rep = representative[resume_idx]
+            k = position[rep]
+            column = stage_two_column.get(k, k) if shortlisted[jd_idx, k] else k
+            matched_skills, missing_skills = pair_skills(jd_idx, column)
+
+            reports[jd_name].append(_match_result(
+                resume_name, similarity[jd_idx, k], match_scores[jd_idx, column], resume_skill_names[column],
+                matched_skills, missing_skills, stage=2 if shortlisted[jd_idx, k] else 1,
+                duplicate_of=resumes[rep][0] if rep != resume_idx else None
+            ))
+
+    metrics.observe("stage_seconds", time.perf_counter() - scoring_start, stage="scoring")
+    logger.info(f"Matched {len(resumes)} resumes against {len(jds)} JDs in "
+                f"{time.perf_counter() - start:.2f}s")
+    return reports
+
+
+def iter_match_results(resume_texts, job_texts, aws_access_key, aws_secret_key, aws_region,
+                       max_concurrency=DEFAULT_MAX_CONCURRENCY, checkpoint=None, skill_mode=DEFAULT_SKILL_MODE,
+                       shortlist_min_score=None, deduplicate=True):
+    """
+    Streaming variant of generate_match_matrix: yields each resume's results as soon
+    as that resume is analysed, so the first rows arrive after one document's latency
+    however large the batch is.
+
+    JDs are analysed first. Resumes are then analysed on the thread pool and yielded in
+    completion order. Scores, two-stage shortlisting (by `shortlist_min_score` only;
+    a top-N cap needs every stage-1 score first) and duplicate handling match
+    generate_match_matrix. Closing the generator cancels resumes not yet started.
+
+    Yields:
+        Tuple[str, Dict[str, dict]]: (resume name, JD name -> result). Duplicates are
+        yielded right after their representative.
+    """
+    jds, resumes = _non_empty_documents(job_texts, resume_texts)
+    if not jds or not resumes:
+        return
+
+    metrics = get_metrics()
+    two_stage = skill_mode != "local" and shortlist_min_score is not None
+    jd_analysis = analyse_documents([text for _, text in jds], aws_access_key, aws_secret_key, aws_region,
+                                    max_concurrency, checkpoint, skill_mode)
+    jd_embeddings = [embedding for _, embedding in jd_analysis]
+    vocab = SkillVocabulary()
+    jd_ids = [vocab.encode(skills) for skills, _ in jd_analysis]
+
+    representative = find_duplicates([text for _, text in resumes]) if deduplicate else list(range(len(resumes)))
+    copies = {}
+    for resume_idx, rep in enumerate(representative):
+        copies.setdefault(rep, []).append(resume_idx)
+    metrics.incr("duplicate_resumes", len(resumes) - len(copies))
+
+    def analyse(rep):
+        text = resumes[rep][1]
+        mode = "local" if two_stage else skill_mode
+        skills, embedding = _analyse_checkpointed(text, aws_access_key, aws_secret_key, aws_region, checkpoint, mode)
+        similarity = cosine_similarity_matrix(jd_embeddings, [embedding])[:, 0]
+        shortlisted = np.ones(len(jds), dtype=bool)
+        analyses = [skills]
+        if two_stage:
+            shortlisted = similarity * 100 >= shortlist_min_score
+            metrics.incr("shortlisted_resumes" if shortlisted.any() else "prefiltered_resumes")
+            if shortlisted.any():
+                # JDs the resume is not shortlisted for keep its stage-1 (local) skills.
+                skills, _ = _analyse_checkpointed(text, aws_access_key, aws_secret_key, aws_region,
+                                                  checkpoint, skill_mode)
+                analyses.append(skills)
+        return analyses, similarity, shortlisted
+
+    workers = max(1, min(int(max_concurrency), len(copies)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match")
+    try:
+        futures = {executor.submit(contextvars.copy_context().run, analyse, rep): rep for rep in copies}
+        for future in as_completed(futures):
+            rep = futures[future]
+            analyses, similarity, shortlisted = future.result()
+            resume_ids = [vocab.encode(skills) for skills in analyses]
+            match_scores, pair_skills = _skill_overlap(vocab, jd_ids, resume_ids)
+            resume_skill_names = [vocab.names(ids) for ids in resume_ids]
+            results = {}
+            for jd_idx, (jd_name, _) in enumerate(jds):
+                # Column 1 holds the stage-2 analysis, when the resume reached stage 2 at all.
+                column = len(analyses) - 1 if shortlisted[jd_idx] else 0
+                matched_skills, missing_skills = pair_skills(jd_idx, column)
+                results[jd_name] = _match_result(
+                    resumes[rep][0], similarity[jd_idx], match_scores[jd_idx, column], resume_skill_names[column],
+                    matched_skills, missing_skills, stage=2 if shortlisted[jd_idx] else 1
+                )
+            for resume_idx in copies[rep]:
+                resume_name = resumes[resume_idx][0]
+                duplicate_of = resumes[rep][0] if resume_idx != rep else None
+                yield resume_name, {
+                    jd_name: dict(result, resume=resume_name, duplicate_of=duplicate_of)
+                    for jd_name, result in results.items()
+                }
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_match_report(resume_texts, job_text, aws_access_key, aws_secret_key, aws_region,
+                          max_concurrency=DEFAULT_MAX_CONCURRENCY, skill_mode=DEFAULT_SKILL_MODE,
+                          shortlist_min_score=None, shortlist_top_n=None, deduplicate=True):
+    """Match every resume against a single job description; results are in input order."""
+    reports = generate_match_matrix(
+        resume_texts, {"jd": job_text}, aws_access_key, aws_secret_key, aws_region, max_concurrency,
+        skill_mode=skill_mode, shortlist_min_score=shortlist_min_score, shortlist_top_n=shortlist_top_n,
+        deduplicate=deduplicate
+    )
+    return reports["jd"]
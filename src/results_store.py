@@ -0,0 +1,244 @@
+import os
+import shutil
+import threading
+import time
+
+RESULTS_FOLDER = "data/results/"
+# Results buffered per JD before they are written out as one Parquet part file.
+RESULT_BATCH_ROWS = 1000
+# Report rows per page in the UI.
+PAGE_SIZE = 50
+# In-page run stores older than this (seconds) are removed by prune_results.
+RESULTS_MAX_AGE = 24 * 3600
+
+# Stored result fields and their report column names, in report order.
+RESULT_COLUMNS = {
+    "resume": "Resume",
+    "match_score": "Skills Match (%)",
+    "embedding_score": "Resume Match (%)",
+    "all_resume_skills": "All Resume Skills",
+    "matched_skills": "Matching Skills with JD",
+    "missing_skills": "Missing Skills from JD",
+    "stage": "Stage",
+    "duplicate_of": "Duplicate Of",
+}
+SKILL_FIELDS = ("all_resume_skills", "matched_skills", "missing_skills")
+SORTABLE_FIELDS = ("embedding_score", "match_score", "resume")
+
+# Exports are built from the parts on first request, under one lock as download
+# callbacks may run on any server thread.
+_export_lock = threading.Lock()
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("resume", pa.string()),
+        ("match_score", pa.float64()),
+        ("embedding_score", pa.float64()),
+        ("all_resume_skills", pa.list_(pa.string())),
+        ("matched_skills", pa.list_(pa.string())),
+        ("missing_skills", pa.list_(pa.string())),
+        ("stage", pa.int64()),
+        ("duplicate_of", pa.string()),
+    ])
+
+
+class ResultStore:
+    """
+    Match results of one run on disk, as a Parquet dataset per JD:
+    <folder>/<jd>/parts/part-00000.parquet, ... Results are appended as they arrive and
+    written out every RESULT_BATCH_ROWS rows (and on `flush`). `query` filters, sorts
+    and pages over the parts with pyarrow, reading only the columns it needs before
+    fetching the rows of one page, so a report is never held whole in memory.
+    pyarrow is imported on first use.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _parts_dir(self, jd_name):
+        return os.path.join(self.folder, jd_name, "parts")
+
+    def _part_paths(self, jd_name):
+        parts_dir = self._parts_dir(jd_name)
+        if not os.path.isdir(parts_dir):
+            return []
+        return sorted(os.path.join(parts_dir, name) for name in os.listdir(parts_dir) if name.endswith(".parquet"))
+
+    def append(self, jd_name, results):
+        """Add result dicts (as produced by src.report) to a JD's report."""
+        with self._lock:
+            pending = self._pending.setdefault(jd_name, [])
+            pending.extend(
+                {
+                    **{field: result[field] for field in RESULT_COLUMNS},
+                    **{field: sorted(result[field]) for field in SKILL_FIELDS},
+                }
+                for result in results
+            )
+            if len(pending) >= RESULT_BATCH_ROWS:
+                self._write_part(jd_name)
+
+    def add_reports(self, reports):
+        """Append a run's reports (JD name -> results) and flush."""
+        for jd_name, results in reports.items():
+            self.append(jd_name, results)
+        self.flush()
+
+    def flush(self):
+        """Write out every buffered result."""
+        with self._lock:
+            for jd_name in list(self._pending):
+                self._write_part(jd_name)
+
+    def _write_part(self, jd_name):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = self._pending.pop(jd_name)
+        if not rows:
+            return
+        parts_dir = self._parts_dir(jd_name)
+        os.makedirs(parts_dir, exist_ok=True)
+        path = os.path.join(parts_dir, f"part-{len(self._part_paths(jd_name)):05d}.parquet")
+        # Readers only ever see complete part files.
+        pq.write_table(pa.Table.from_pylist(rows, schema=_schema()), path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def clear(self):
+        """Drop every stored and buffered result (a rerun appends from scratch)."""
+        with self._lock:
+            self._pending.clear()
+            shutil.rmtree(self.folder, ignore_errors=True)
+            os.makedirs(self.folder, exist_ok=True)
+
+    def _dataset(self, jd_name):
+        import pyarrow.dataset as ds
+
+        paths = self._part_paths(jd_name)
+        return ds.dataset(paths, schema=_schema(), format="parquet") if paths else None
+
+    def count(self, jd_name):
+        """Number of stored results for a JD."""
+        dataset = self._dataset(jd_name)
+        return dataset.count_rows() if dataset is not None else 0
+
+    def query(self, jd_name, search="", min_score=None, sort_by="embedding_score", descending=True, page=0,
+              page_size=PAGE_SIZE):
+        """
+        One page of a JD's report.
+
+        Args:
+            search: Case-insensitive substring of the resume name or of any resume skill.
+            min_score: Minimum "Resume Match (%)", or None for no minimum.
+            sort_by: One of SORTABLE_FIELDS.
+            page: Zero-based page number.
+
+        Returns:
+            Tuple[List[dict], int]: Report rows (see RESULT_COLUMNS, skills joined with ", ")
+            and the number of results matching the filters.
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        dataset = self._dataset(jd_name)
+        if dataset is None:
+            return [], 0
+        columns = {"resume", "embedding_score", sort_by}
+        if search:
+            columns.add("all_resume_skills")
+        table = dataset.to_table(columns=sorted(columns)).combine_chunks()
+        table = table.append_column("_row", pa.array(np.arange(table.num_rows)))
+
+        mask = pa.array(np.ones(table.num_rows, dtype=bool))
+        if min_score is not None:
+            mask = pc.greater_equal(table["embedding_score"], min_score)
+        if search:
+            skills = table["all_resume_skills"].chunk(0) if table.num_rows else pa.array([], pa.list_(pa.string()))
+            skill_hits = pc.match_substring(pc.list_flatten(skills), search, ignore_case=True)
+            has_skill = np.zeros(table.num_rows, dtype=bool)
+            has_skill[pc.list_parent_indices(skills).filter(skill_hits).to_numpy()] = True
+            in_name = pc.match_substring(table["resume"], search, ignore_case=True)
+            mask = pc.and_(mask, pc.or_(in_name, pa.array(has_skill)))
+        table = table.filter(mask)
+
+        order = pc.sort_indices(table, sort_keys=[(sort_by, "descending" if descending else "ascending")])
+        rows = pc.take(table["_row"], order[page * page_size:(page + 1) * page_size])
+        page_table = dataset.take(rows) if len(rows) else dataset.schema.empty_table()
+        return _report_rows(page_table.to_pylist()), table.num_rows
+
+    def export(self, jd_name, file_format):
+        """
+        Path of a JD's full report as "csv" (report columns) or "parquet" (stored fields),
+        written batch by batch from the parts on first request and rewritten only after
+        new parts are added.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.folder, jd_name, f"report.{file_format}")
+        parts = self._part_paths(jd_name)
+        with _export_lock:
+            if os.path.exists(path) and all(os.path.getmtime(part) <= os.path.getmtime(path) for part in parts):
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            dataset = self._dataset(jd_name)
+            batches = dataset.to_batches() if dataset is not None else []
+            if file_format == "csv":
+                schema = _csv_schema()
+                with pa_csv.CSVWriter(path + ".tmp", schema) as writer:
+                    for batch in batches:
+                        columns = []
+                        for field in RESULT_COLUMNS:
+                            column = batch[field]
+                            if field in SKILL_FIELDS:
+                                column = pc.binary_join(column, ", ")
+                            elif field == "duplicate_of":
+                                column = pc.fill_null(column, "")
+                            columns.append(column)
+                        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+            else:
+                with pq.ParquetWriter(path + ".tmp", _schema()) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+            os.replace(path + ".tmp", path)
+        return path
+
+
+def _csv_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        (name, pa.string() if field in SKILL_FIELDS else _schema().field(field).type)
+        for field, name in RESULT_COLUMNS.items()
+    ])
+
+
+def _report_rows(records):
+    return [
+        {
+            name: ", ".join(record[field] or []) if field in SKILL_FIELDS else (
+                record[field] if record[field] is not None else ""
+            )
+            for field, name in RESULT_COLUMNS.items()
+        }
+        for record in records
+    ]
+
+
+def prune_results(folder=RESULTS_FOLDER, max_age=RESULTS_MAX_AGE):
+    """Remove run stores under `folder` not modified for `max_age` seconds."""
+    if not os.path.isdir(folder):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
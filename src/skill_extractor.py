@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import threading
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "skill_taxonomy.json")
+
+# Characters that continue a token: "java" must not match inside "javascript",
+# nor "c" inside "c++".
+_WORD_CHARS = r"\w+#"
+
+
+def normalise_surface(term):
+    """Lowercase and collapse whitespace, the form aliases are looked up in."""
+    return " ".join(term.lower().split())
+
+
+def _squash(surface):
+    """Drop everything but word characters, "+" and "#": "node.js" -> "nodejs"."""
+    return re.sub(rf"[^{_WORD_CHARS}]", "", surface)
+
+
+def _trie_pattern(terms):
+    """
+    Build a regex from a character trie of `terms`.
+
+    Shared prefixes are factored out ("java|javascript" -> "java(?:script)?"), so the
+    regex engine walks the trie once per start position instead of trying every
+    alternative; optional tails are greedy, which gives leftmost-longest matches.
+    Spaces in terms match any run of whitespace.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        terminal = "" in node
+        branches = []
+        for char in sorted(key for key in node if key):
+            token = r"\s+" if char == " " else re.escape(char)
+            branches.append(token + build(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """
+    Dictionary-based skill extractor over a curated taxonomy.
+
+    Every alias (and canonical name) is compiled into one trie-shaped regex with token
+    boundaries, so extraction is a single left-to-right scan of the text in C, and each
+    hit is mapped back to its canonical skill ("k8s" -> "kubernetes").
+    """
+
+    def __init__(self, taxonomy):
+        exclude = {normalise_surface(term) for term in taxonomy.get("exclude", [])}
+        # Every surface form -> canonical. Excluded forms are still used to canonicalise
+        # skill strings (an LLM saying "node" means node.js), just not matched in free text.
+        self.aliases = {}
+        self._squashed = {}
+        for canonical, aliases in taxonomy["skills"].items():
+            for surface in [canonical, *aliases]:
+                surface = normalise_surface(surface)
+                if surface:
+                    self.aliases.setdefault(surface, canonical)
+                    self._squashed.setdefault(_squash(surface), canonical)
+        self.canonical_skills = sorted(taxonomy["skills"])
+        searchable = sorted(surface for surface in self.aliases if surface not in exclude)
+        self._pattern = re.compile(
+            rf"(?<![{_WORD_CHARS}])(?:{_trie_pattern(searchable)})(?![{_WORD_CHARS}])"
+        )
+
+    @classmethod
+    def from_file(cls, path=TAXONOMY_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def canonicalise(self, skill):
+        """
+        Canonical name for a skill string, or the normalised string if it is unknown.
+        Falls back to ignoring punctuation and spacing, so "Node JS" -> "node.js".
+        """
+        surface = normalise_surface(skill)
+        canonical = self.aliases.get(surface)
+        if canonical is None:
+            canonical = self._squashed.get(_squash(surface), surface)
+        return canonical
+
+    def extract(self, text):
+        """
+        Returns:
+            List[str]: Sorted canonical skills found in `text`.
+        """
+        found = set()
+        for match in self._pattern.finditer(text.lower()):
+            found.add(self.aliases[normalise_surface(match.group(0))])
+        return sorted(found)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    """Process-wide SkillMatcher built from the bundled taxonomy."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher.from_file()
+    return _matcher
+
+
+def extract_local_skills(text):
+    """Extract technical skills from text with the local taxonomy matcher (no LLM call)."""
+    return get_skill_matcher().extract(text)
@@ -0,0 +1,101 @@
+import threading
+import numpy as np
+from src.skill_extractor import get_skill_matcher
+
+# Number of set bits in every byte value, for popcount over packed bitsets.
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class SkillVocabulary:
+    """
+    Interns skills to canonical integer ids.
+
+    Skill strings are first canonicalised through the skill taxonomy, so "node.js",
+    "nodejs" and "node" share one id; unknown skills get an id of their own. Documents
+    are then represented as packed bitsets over the vocabulary, which lets skill
+    overlap for every JD x resume pair be computed with vectorised AND + popcount.
+    Ids are stable for the life of the vocabulary; build one per run, as it interns
+    every skill string it is given (including free-form LLM output) and never shrinks.
+    The skill matcher behind it is shared.
+    """
+
+    def __init__(self, matcher=None):
+        self._matcher = matcher or get_skill_matcher()
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._names = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, skill):
+        """Canonical id for a skill string."""
+        canonical = self._matcher.canonicalise(skill)
+        skill_id = self._ids.get(canonical)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._ids.get(canonical)
+                if skill_id is None:
+                    skill_id = len(self._names)
+                    self._names.append(canonical)
+                    self._ids[canonical] = skill_id
+        return skill_id
+
+    def name(self, skill_id):
+        return self._names[skill_id]
+
+    def names(self, skill_ids):
+        """Canonical names for ids, sorted."""
+        return sorted(self._names[skill_id] for skill_id in skill_ids)
+
+    def encode(self, skills):
+        """Sorted, de-duplicated canonical ids for a list of skill strings."""
+        return sorted({self.intern(skill) for skill in skills if skill and skill.strip()})
+
+    def bitsets(self, id_lists, size=None):
+        """
+        Pack id lists into a bitset matrix.
+
+        Args:
+            size: Number of bits per row; defaults to the current vocabulary size. Pass
+                the same value for matrices that will be compared, as other threads
+                may intern new skills in between.
+
+        Returns:
+            np.ndarray: len(id_lists) x ceil(size / 8) uint8 matrix, bit i of row j set
+            when document j has skill id i.
+        """
+        dense = np.zeros((len(id_lists), max(size or len(self), 1)), dtype=bool)
+        for row, skill_ids in enumerate(id_lists):
+            dense[row, skill_ids] = True
+        return np.packbits(dense, axis=1)
+
+
+def popcount(bits):
+    """Set bits per row of a packed bitset matrix."""
+    return _POPCOUNT[bits].sum(axis=-1, dtype=np.int32)
+
+
+def overlap_counts(jd_bits, resume_bits):
+    """
+    |JD skills AND resume skills| for every pair.
+
+    Args:
+        jd_bits: N x W packed bitsets.
+        resume_bits: M x W packed bitsets over the same vocabulary.
+
+    Returns:
+        np.ndarray: N x M int32 matrix of shared skill counts.
+    """
+    counts = np.empty((len(jd_bits), len(resume_bits)), dtype=np.int32)
+    # One vectorised AND + popcount over the whole resume corpus per JD keeps the
+    # temporary at M x W bytes instead of N x M x W.
+    for row, jd_row in enumerate(jd_bits):
+        counts[row] = popcount(np.bitwise_and(resume_bits, jd_row))
+    return counts
+
+
+def unpack_ids(bits):
+    """Skill ids set in one packed bitset row."""
+    return np.flatnonzero(np.unpackbits(bits)).tolist()
+
@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import numpy as np
+from src.cache import content_hash
+from src.dedup import find_duplicates
+from src.embeddings import EMBEDDING_MODEL_ID, generate_document_embedding
+from src.logger import logger
+from src.report import DEFAULT_MAX_CONCURRENCY, DEFAULT_SKILL_MODE, analyse_documents
+
+RESUME_INDEX_FOLDER = "data/resume_index/"
+EMBEDDING_DIM = 1536  # Titan Embeddings G1 - Text
+
+# Rewrite the vector file once this fraction of rows has been removed.
+_COMPACT_RATIO = 0.25
+# Rows scored per matmul in search_vector.
+_SEARCH_BLOCK = 16384
+
+
+class ResumeIndex:
+    """
+    Persistent store of resume embeddings with top-k search.
+
+    Vectors are L2-normalised and kept in a flat, memory-mapped file (float32, or int8
+    with a per-row scale when `quantize=True`, ~4x smaller), so a search is a single
+    matrix-vector product over the mapped rows. Resume names, skills and any extra
+    metadata live in a JSON sidecar. Rows are appended on `add` and tombstoned on
+    `remove`; the vector file is compacted once enough rows are dead.
+    """
+
+    def __init__(self, folder=RESUME_INDEX_FOLDER, dim=EMBEDDING_DIM, quantize=False):
+        self.folder = folder
+        self._lock = threading.RLock()
+        self._matrix = None
+        os.makedirs(folder, exist_ok=True)
+
+        self._meta_path = os.path.join(folder, "meta.json")
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+        else:
+            self._meta = {
+                "model_id": EMBEDDING_MODEL_ID,
+                "dim": dim,
+                "dtype": "int8" if quantize else "float32",
+                "rows": 0,
+                "entries": [],
+            }
+        self.dim = self._meta["dim"]
+        self.dtype = np.dtype(self._meta["dtype"])
+        self._vectors_path = os.path.join(folder, f"vectors.{self.dtype.name}")
+        self._scales_path = os.path.join(folder, "scales.float32")
+        self._rebuild_lookup()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._by_id
+
+    def _rebuild_lookup(self):
+        self._by_id = {
+            entry["id"]: row for row, entry in enumerate(self._meta["entries"]) if entry["active"]
+        }
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _load_matrix(self):
+        """Memory-map the stored rows; returns (vectors, scales or None)."""
+        if self._matrix is None:
+            rows = self._meta["rows"]
+            if rows == 0:
+                return np.empty((0, self.dim), dtype=self.dtype), None
+            vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            scales = None
+            if self.dtype == np.int8:
+                scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(rows,))
+            self._matrix = (vectors, scales)
+        return self._matrix
+
+    def _encode(self, embeddings):
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        if self.dtype != np.int8:
+            return vectors, None
+        scales = np.abs(vectors).max(axis=1)
+        scales[scales == 0] = 1.0
+        quantized = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+        return quantized, (scales / 127).astype(np.float32)
+
+    def add(self, doc_id, name, embedding, skills=None, metadata=None):
+        """Add one resume, replacing any existing entry with the same id."""
+        self.add_many([(doc_id, name, embedding, skills, metadata)])
+
+    def add_many(self, items):
+        """Add (doc_id, name, embedding, skills, metadata) tuples in one append."""
+        if not items:
+            return
+        with self._lock:
+            for doc_id, *_ in items:
+                self._tombstone(doc_id)
+            vectors, scales = self._encode([item[2] for item in items])
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(self._meta["rows"] * self.dim * self.dtype.itemsize)
+                f.write(vectors.tobytes())
+            if scales is not None:
+                with open(self._scales_path, "ab") as f:
+                    f.truncate(self._meta["rows"] * 4)
+                    f.write(scales.tobytes())
+            for doc_id, name, _, skills, metadata in items:
+                self._by_id[doc_id] = len(self._meta["entries"])
+                self._meta["entries"].append({
+                    "id": doc_id,
+                    "name": name,
+                    "skills": sorted(skills or []),
+                    "metadata": metadata or {},
+                    "active": True,
+                })
+            self._meta["rows"] += len(items)
+            self._matrix = None
+            self._save_meta()
+
+    def _tombstone(self, doc_id):
+        row = self._by_id.pop(doc_id, None)
+        if row is not None:
+            self._meta["entries"][row]["active"] = False
+        return row is not None
+
+    def remove(self, doc_id):
+        """Remove a resume by id. Returns True if it was present."""
+        with self._lock:
+            removed = self._tombstone(doc_id)
+            if removed:
+                dead = self._meta["rows"] - len(self._by_id)
+                if dead >= self._meta["rows"] * _COMPACT_RATIO:
+                    self.compact()
+                else:
+                    self._save_meta()
+            return removed
+
+    def compact(self):
+        """Rewrite the vector files without removed rows."""
+        with self._lock:
+            vectors, scales = self._load_matrix()
+            keep = np.array(sorted(self._by_id.values()), dtype=np.int64)
+            kept_vectors = np.asarray(vectors[keep]) if len(keep) else np.empty((0, self.dim), self.dtype)
+            kept_scales = np.asarray(scales[keep]) if scales is not None and len(keep) else None
+            self._matrix = None
+            del vectors, scales
+
+            for path, data in ((self._vectors_path, kept_vectors), (self._scales_path, kept_scales)):
+                if data is None:
+                    continue
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data.tobytes())
+                os.replace(tmp_path, path)
+
+            self._meta["entries"] = [self._meta["entries"][row] for row in keep]
+            self._meta["rows"] = len(keep)
+            self._rebuild_lookup()
+            self._save_meta()
+            logger.info(f"Compacted resume index {self.folder} to {len(keep)} rows")
+
+    def search_vector(self, query_embedding, k=10):
+        """Top-k stored resumes by cosine similarity to an embedding."""
+        with self._lock:
+            if not self._by_id:
+                return []
+            vectors, scales = self._load_matrix()
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+
+            # Score in blocks so int8 rows are upcast a slice at a time, not all at once.
+            scores = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), _SEARCH_BLOCK):
+                block = vectors[start:start + _SEARCH_BLOCK]
+                scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+            if scales is not None:
+                scores *= scales
+                np.clip(scores, -1.0, 1.0, out=scores)  # quantisation error can overshoot 1.0
+            active = np.zeros(len(scores), dtype=bool)
+            active[list(self._by_id.values())] = True
+            scores[~active] = -np.inf
+
+            k = min(k, len(self._by_id))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            entries = self._meta["entries"]
+            return [
+                {
+                    "id": entries[row]["id"],
+                    "resume": entries[row]["name"],
+                    "score": round(float(scores[row]) * 100, 2),
+                    "skills": entries[row]["skills"],
+                    "metadata": entries[row]["metadata"],
+                }
+                for row in top
+            ]
+
+    def search(self, jd_text, aws_access_key, aws_secret_key, aws_region, k=10):
+        """Embed a job description once and return the top-k stored resumes."""
+        if not jd_text.strip():
+            return []
+        query = generate_document_embedding(jd_text, aws_access_key, aws_secret_key, aws_region)
+        return self.search_vector(query, k)
+
+
+def index_resumes(index, resume_texts, aws_access_key, aws_secret_key, aws_region,
+                  max_concurrency=DEFAULT_MAX_CONCURRENCY, skill_mode=DEFAULT_SKILL_MODE):
+    """
+    Analyse resumes (skills + embedding) and add them to `index`, keyed by text hash.
+    Resumes already in the index, and near-duplicates of another resume in the batch,
+    are skipped.
+    """
+    pending = [
+        (content_hash(text), name, text)
+        for name, text in resume_texts.items()
+        if text.strip() and content_hash(text) not in index
+    ]
+    representative = find_duplicates([text for _, _, text in pending])
+    pending = [item for i, item in enumerate(pending) if representative[i] == i]
+    if not pending:
+        return 0
+    analysed = analyse_documents(
+        [text for _, _, text in pending], aws_access_key, aws_secret_key, aws_region, max_concurrency,
+        skill_mode=skill_mode
+    )
+    index.add_many([
+        (doc_id, name, embedding, skills, None)
+        for (doc_id, name, _), (skills, embedding) in zip(pending, analysed)
+    ])
+    return len(pending)
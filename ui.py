@@ -1,20 +1,37 @@
 # ui.py
 import streamlit as st
 import os
-import pandas as pd
-import zipfile
-from io import BytesIO
-from src.parser import parse_resume, extract_text_from_file
-from src.report import generate_match_report
+import json
+import math
+import shutil
+import time
+import uuid
+from collections import deque
+from functools import partial
+from src.parser import parse_documents, DOCUMENT_EXTENSIONS, RESUME_EXTENSIONS
+from src.ingest import ZipLimitError, link_source, list_zip_members, save_upload
+from src.report import DEFAULT_MAX_CONCURRENCY, DEFAULT_SKILL_MODE, SKILL_MODES
+from src.engine import (
+    DEFAULT_MIN_MATCH_SCORE, REPORT_COLUMNS, TOKEN_REPORT_COLUMNS, export_selected, jd_report_names, report_rows,
+    run_matching, selected_archive, stream_matching, token_rows
+)
 from src.utils import clear_folder
 from src.bedrock_llm import set_bedrock_credentials  # New utility
-import unicodedata
+from src.bedrock_client import CLIENT_SETTINGS, configure_bedrock_client, get_bedrock_client
+from src.vector_index import ResumeIndex
+from src.metrics import get_metrics
+from src.jobs import WorkerPool, delete_job, job_folder, load_job_results, new_job_id
+from src.results_store import PAGE_SIZE, RESULTS_FOLDER, RESULT_COLUMNS, SORTABLE_FIELDS, ResultStore, prune_results
 
 # Folders
 #
 RESUME_UPLOAD_FOLDER = "data/resumes/"
 JOB_DESC_UPLOAD_FOLDER = "data/job_descriptions/"
 SELECTED_PROFILE_FOLDER = "selected_profile/"
+# Seconds between table refreshes while results stream in.
+STREAM_RENDER_INTERVAL = 0.5
+# Seconds between refreshes of the background jobs list.
+JOB_POLL_INTERVAL = 2
 
 os.makedirs(RESUME_UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(JOB_DESC_UPLOAD_FOLDER, exist_ok=True)
@@ -53,54 +70,245 @@ resume_input = st.sidebar.file_uploader(
     accept_multiple_files=False
 )
 
-min_match_score = st.sidebar.number_input("Minimum Resume Match Score (%)", min_value=0, max_value=100, value=70)
+min_match_score = st.sidebar.number_input(
+    "Minimum Resume Match Score (%)", min_value=0, max_value=100, value=DEFAULT_MIN_MATCH_SCORE
+)
+max_concurrency = st.sidebar.number_input(
+    "Max Concurrent Bedrock Requests", min_value=1, max_value=64, value=DEFAULT_MAX_CONCURRENCY,
+    help="Number of resumes processed in parallel. Lower this if Bedrock starts throttling."
+)
+
+skill_mode = st.sidebar.selectbox(
+    "Skill Extraction", SKILL_MODES, index=SKILL_MODES.index(DEFAULT_SKILL_MODE),
+    help="llm: Claude on every document. local: skill taxonomy only (instant, no Bedrock call). "
+         "hybrid: taxonomy first, Claude only for documents where few skills are found."
+)
+
+two_stage = st.sidebar.checkbox(
+    "Two-stage ranking", value=False,
+    help="Score every resume on embeddings and local skills first; run skill extraction only on resumes "
+         "at or above the minimum match score. Other resumes are reported with their stage-1 result."
+)
+shortlist_top_n = st.sidebar.number_input(
+    "Max shortlisted resumes per JD (0 = no limit)", min_value=0, max_value=10000, value=0, disabled=not two_stage
+)
+
+run_in_background = st.sidebar.checkbox(
+    "Run as background job", value=True,
+    help="Queue the batch for a worker process. It keeps running if this tab closes or reconnects, "
+         "can be cancelled, and its results stay available under Background Jobs."
+)
+
+st.sidebar.header("🗂️ Resume Index")
+add_to_index = st.sidebar.checkbox("Save processed resumes to the resume index", value=False)
+index_top_k = st.sidebar.number_input("Top-K candidates from index", min_value=1, max_value=500, value=20)
 
 # Session state
-if "match_reports" not in st.session_state:
-    st.session_state.match_reports = {}
+if "index_results" not in st.session_state:
+    st.session_state.index_results = {}
+if "report_jds" not in st.session_state:
+    st.session_state.report_jds = []
+if "results_folder" not in st.session_state:
+    st.session_state.results_folder = None
 if "selected_profiles" not in st.session_state:
     st.session_state.selected_profiles = {}
 if "processed" not in st.session_state:
     st.session_state.processed = False
+if "run_metrics" not in st.session_state:
+    st.session_state.run_metrics = None
+if "selected_folder" not in st.session_state:
+    st.session_state.selected_folder = SELECTED_PROFILE_FOLDER
+
+# Jobs belong to an owner id kept in the URL, so they can be found again after a reconnect.
+if "owner" not in st.query_params:
+    st.query_params["owner"] = uuid.uuid4().hex[:12]
+owner = st.query_params["owner"]
 
 # Helpers
-def extract_files_from_zip(uploaded_zip, save_dir, allowed_ext):
-    extracted = []
-    with zipfile.ZipFile(BytesIO(uploaded_zip.read()), "r") as zip_ref:
-        for file_name in zip_ref.namelist():
-            if file_name.lower().endswith(tuple(allowed_ext)):
-                # Normalize file name (remove special chars and spaces)
-                safe_name = unicodedata.normalize("NFKD", os.path.basename(file_name)).encode("ascii", "ignore").decode("ascii")
-                safe_name = safe_name.replace(" ", "_")
-                full_path = os.path.join(save_dir, safe_name)
-
-                with open(full_path, "wb") as f:
-                    f.write(zip_ref.read(file_name))
-                extracted.append(full_path)
-    return extracted
-
-
-def save_file(uploaded_file, save_dir):
-    file_path = os.path.join(save_dir, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getvalue())
-    return [file_path]
+def dataframe(rows, columns=None):
+    """pandas is imported on first use, so reruns that show no table never pay for it."""
+    import pandas as pd
+
+    return pd.DataFrame(rows, columns=columns)
+
+
+def ingest_upload(uploaded_file, save_dir, allowed_ext):
+    """
+    Save an upload once and return {file name: source}. ZIP members are not extracted;
+    they are referenced as (zip path, member name) and streamed to the parser.
+
+    Streamlit reruns the script on every interaction; an upload already ingested into
+    `save_dir` (same file_id) returns its recorded sources without being copied again,
+    unless its files are gone (a new session clears the shared upload folders).
+    """
+    ingested = st.session_state.setdefault("ingested_uploads", {})
+    key = (uploaded_file.file_id, save_dir)
+    sources = ingested.get(key)
+    if sources is not None and all(
+        os.path.exists(source[0] if isinstance(source, tuple) else source) for source in sources.values()
+    ):
+        return sources
+
+    file_path = save_upload(uploaded_file, save_dir)
+    if file_path.lower().endswith(".zip"):
+        try:
+            sources = {name: (file_path, member) for name, member in list_zip_members(file_path, allowed_ext)}
+        except ZipLimitError as e:
+            st.error(f"❌ {uploaded_file.name} was rejected: {e}")
+            return {}
+    else:
+        sources = {os.path.basename(file_path): file_path}
+    ingested[key] = sources
+    return sources
+
+
+def parse_job_descriptions(jd_names):
+    """Extract text for the selected JDs, keyed by report name (as in a matching run)."""
+    parsed = parse_documents({name: jd_file_map[name] for name in jd_names}, allowed_ext=DOCUMENT_EXTENSIONS)
+    report_names = jd_report_names(doc["name"] for doc in parsed)
+    return {report_names[doc["name"]]: doc["text"] for doc in parsed}
+
+
+@st.cache_resource(show_spinner=False)
+def init_bedrock_client(aws_access_key, aws_secret_key, aws_region, max_concurrency):
+    """Create the shared Bedrock client once per process, sized for the requested concurrency."""
+    if max_concurrency > CLIENT_SETTINGS["max_pool_connections"]:
+        configure_bedrock_client(max_pool_connections=int(max_concurrency))
+    return get_bedrock_client(aws_access_key, aws_secret_key, aws_region)
+
+
+@st.cache_resource(show_spinner=False)
+def get_resume_index():
+    """Open the persistent resume index once per process."""
+    return ResumeIndex()
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_pool():
+    """Start the background job workers once per process."""
+    return WorkerPool()
+
+
+def submit_job(jd_sources, resume_input, run_options, shortlist_top_n):
+    """
+    Copy the inputs into a new job's folder (the upload folders are cleared per session)
+    and queue it. Returns the job id, or None if the upload held no resumes.
+    """
+    job_id = new_job_id()
+    inputs = os.path.join(job_folder(job_id), "inputs")
+    os.makedirs(os.path.join(inputs, "jds"), exist_ok=True)
+    os.makedirs(os.path.join(inputs, "resumes"), exist_ok=True)
+    resume_sources = ingest_upload(resume_input, os.path.join(inputs, "resumes"), RESUME_EXTENSIONS)
+    if not resume_sources:
+        return None
+    jd_sources = {name: link_source(source, os.path.join(inputs, "jds", name)) for name, source in jd_sources.items()}
+    params = {
+        "jd_sources": jd_sources,
+        "resume_sources": resume_sources,
+        "max_concurrency": run_options["max_concurrency"],
+        "min_match_score": run_options["min_match_score"],
+        "skill_mode": run_options["skill_mode"],
+        "two_stage": run_options["two_stage"],
+        "shortlist_top_n": shortlist_top_n,
+    }
+    return get_job_pool().submit(owner, params, run_options["aws_access_key"], run_options["aws_secret_key"],
+                                 run_options["aws_region"], job_id=job_id)
+
+
+def read_archive(selected_folder, jd_name, names, run_id):
+    """Contents of the run's archive of selected resumes for one JD (download callback)."""
+    with open(selected_archive(selected_folder, jd_name, names, run_id), "rb") as f:
+        return f.read()
+
+
+def read_export(results_folder, jd_name, file_format):
+    """Contents of a JD's full report exported from the result store (download callback)."""
+    with open(ResultStore(results_folder).export(jd_name, file_format), "rb") as f:
+        return f.read()
+
+
+def show_results(run, run_id, selected_folder, results_folder, metrics_summary, prometheus_text):
+    """
+    Put a finished run in session state for the report display below. Reports stay in
+    the run's ResultStore at `results_folder`; only its location is kept in the session.
+    """
+    st.session_state.run_id = run_id
+    st.session_state.selected_profiles.clear()
+    st.session_state.run_metrics = metrics_summary
+    st.session_state.run_metrics_prom = prometheus_text
+    st.session_state.run_tokens = token_rows(run)
+    st.session_state.selected_folder = selected_folder
+    st.session_state.results_folder = results_folder
+    st.session_state.report_jds = list(run["selected"])
+    for jd_name, names in run["selected"].items():
+        st.session_state.selected_profiles[jd_name] = names
+    st.session_state.processed = True
+
+
+def stream_run(jd_sources, resume_sources, store, **run_options):
+    """
+    Run matching with stream_matching, appending results to `store` as resumes complete
+    and showing the latest of them per JD, with a progress bar, ETA and running count
+    of selected profiles. Returns the finished run dict.
+    """
+    status = st.empty()
+    status.info("📄 Parsing documents...")
+    progress = st.progress(0.0)
+    selected_count = st.empty()
+    tables = {}
+    rows = {}
+    counts = {}
+    selected = 0
+    min_match_score = run_options["min_match_score"]
+    start = last_render = time.monotonic()
+
+    for event in stream_matching(jd_sources, resume_sources, **run_options):
+        if event["event"] == "parsed":
+            status.info(f"🤖 Matching {event['total']} resumes against {len(event['jds'])} job description(s)...")
+            for jd_name in event["jds"]:
+                tables[jd_name] = st.empty()
+                rows[jd_name] = deque(maxlen=PAGE_SIZE)
+                counts[jd_name] = 0
+        elif event["event"] == "result":
+            for jd_name, result in event["results"].items():
+                store.append(jd_name, [result])
+                rows[jd_name].extend(report_rows([result]))
+                counts[jd_name] += 1
+                selected += result["embedding_score"] >= min_match_score
+            done, total = event["done"], event["total"]
+            elapsed = time.monotonic() - start
+            eta = elapsed / done * (total - done)
+            progress.progress(done / total, text=f"{done}/{total} resumes matched · ETA {eta:.0f}s")
+            selected_count.metric("Selected profiles", selected)
+            # Re-rendering every table on every result is quadratic; refresh at most twice a second.
+            if done == total or time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+                for jd_name, table in tables.items():
+                    with table.container():
+                        st.subheader(f"📊 Matching Report for JD: {jd_name}")
+                        st.caption(f"Latest {len(rows[jd_name])} of {counts[jd_name]} results")
+                        st.dataframe(dataframe(list(rows[jd_name]), columns=REPORT_COLUMNS))
+                last_render = time.monotonic()
+        else:
+            run = event["run"]
+    store.flush()
+
+    # The full report is rendered below from the result store.
+    for placeholder in [status, progress, selected_count, *tables.values()]:
+        placeholder.empty()
+    return run
+
 
 # Pre-process JD file and populate dropdown
-jd_paths = []
+jd_file_map = {}
 if jd_input:
-    if jd_input.name.endswith(".zip"):
-        jd_paths = extract_files_from_zip(jd_input, JOB_DESC_UPLOAD_FOLDER, ["txt", "pdf", "docx"])
-    else:
-        jd_paths = save_file(jd_input, JOB_DESC_UPLOAD_FOLDER)
+    jd_file_map = ingest_upload(jd_input, JOB_DESC_UPLOAD_FOLDER, DOCUMENT_EXTENSIONS)
 
-jd_file_map = {os.path.basename(path): path for path in jd_paths}
-selected_jd_name = None
-selected_jd_path = None
+selected_jd_names = []
 
 if jd_file_map:
-    selected_jd_name = st.sidebar.selectbox("Select Job Description to Match", list(jd_file_map.keys()))
-    selected_jd_path = jd_file_map[selected_jd_name]
+    selected_jd_names = st.sidebar.multiselect(
+        "Select Job Description(s) to Match", list(jd_file_map.keys()), default=list(jd_file_map.keys())
+    )
 
 # Processing logic
 if st.sidebar.button("Process Matching"):
@@ -108,71 +316,228 @@ if st.sidebar.button("Process Matching"):
         st.error("❌ Please provide AWS credentials and region to proceed.")
     else:
         set_bedrock_credentials(st.session_state.aws_access_key, st.session_state.aws_secret_key, st.session_state.aws_region)
+        init_bedrock_client(st.session_state.aws_access_key, st.session_state.aws_secret_key,
+                            st.session_state.aws_region, max_concurrency)
 
-        clear_folder(SELECTED_PROFILE_FOLDER)
-        st.session_state.match_reports.clear()
-        st.session_state.selected_profiles.clear()
-        st.session_state.processed = False
+        if not selected_jd_names or not resume_input:
+            st.warning("Please upload both job descriptions and resumes!")
+        elif run_in_background:
+            run_options = dict(
+                aws_access_key=st.session_state.aws_access_key,
+                aws_secret_key=st.session_state.aws_secret_key,
+                aws_region=st.session_state.aws_region,
+                max_concurrency=max_concurrency,
+                min_match_score=min_match_score,
+                skill_mode=skill_mode,
+                two_stage=two_stage
+            )
+            if add_to_index:
+                st.info("🗂️ Background jobs don't update the resume index; run in the foreground to index resumes.")
+            job_id = submit_job({name: jd_file_map[name] for name in selected_jd_names}, resume_input, run_options,
+                                shortlist_top_n if two_stage else 0)
+            if job_id:
+                st.success(f"📨 Job {job_id} queued. Follow it under Background Jobs.")
+        else:
+            clear_folder(SELECTED_PROFILE_FOLDER)
+            # Reports of this session's previous run, and of runs left by closed sessions.
+            if st.session_state.results_folder and st.session_state.results_folder.startswith(RESULTS_FOLDER):
+                shutil.rmtree(st.session_state.results_folder, ignore_errors=True)
+            prune_results()
+            run_id = uuid.uuid4().hex[:12]
+            store = ResultStore(os.path.join(RESULTS_FOLDER, run_id))
+            st.session_state.report_jds = []
+            st.session_state.selected_profiles.clear()
+            st.session_state.processed = False
+            resume_sources = ingest_upload(resume_input, RESUME_UPLOAD_FOLDER, RESUME_EXTENSIONS)
 
-        jd_paths = [selected_jd_path] if selected_jd_path else []
-        resume_paths = []
+            run_options = dict(
+                aws_access_key=st.session_state.aws_access_key,
+                aws_secret_key=st.session_state.aws_secret_key,
+                aws_region=st.session_state.aws_region,
+                max_concurrency=max_concurrency,
+                min_match_score=min_match_score,
+                index=get_resume_index() if add_to_index else None,
+                skill_mode=skill_mode,
+                two_stage=two_stage
+            )
+            jd_sources = {name: jd_file_map[name] for name in selected_jd_names}
+            if two_stage and shortlist_top_n:
+                # A top-N shortlist needs every stage-1 score, so this run can't stream.
+                with st.spinner(text="Matching in progress..."):
+                    run = run_matching(jd_sources, resume_sources, shortlist_top_n=shortlist_top_n, **run_options)
+                store.add_reports(run["reports"])
+            else:
+                run = stream_run(jd_sources, resume_sources, store, **run_options)
 
-        with st.spinner(text="Matching in progress..."):
-            if resume_input:
-                if resume_input.name.endswith(".zip"):
-                    resume_paths = extract_files_from_zip(resume_input, RESUME_UPLOAD_FOLDER, ["pdf", "docx"])
-                else:
-                    resume_paths = save_file(resume_input, RESUME_UPLOAD_FOLDER)
+            failed = [f"{doc['name']} ({doc['status']})" for doc in run["parsed"]
+                      if doc["status"] not in ("ok", "cached")]
+            if failed:
+                st.warning(f"⚠️ {len(failed)} file(s) could not be fully parsed: {', '.join(failed)}")
+            if add_to_index:
+                st.info(f"🗂️ Added {run['indexed']} new resumes to the resume index ({len(get_resume_index())} total).")
 
-            if not jd_paths or not resume_paths:
-                st.warning("Please upload both job descriptions and resumes!")
-            else:
-                resume_texts = {
-                    os.path.basename(path): parse_resume(path)
-                    for path in resume_paths
+            export_selected(run, resume_sources, SELECTED_PROFILE_FOLDER)
+            show_results(run, run_id, SELECTED_PROFILE_FOLDER, store.folder, get_metrics().summary(),
+                         get_metrics().to_prometheus())
+
+if st.sidebar.button("Search Resume Index"):
+    if not (st.session_state.aws_access_key and st.session_state.aws_secret_key and st.session_state.aws_region):
+        st.error("❌ Please provide AWS credentials and region to proceed.")
+    elif not selected_jd_names:
+        st.warning("Please upload and select at least one job description!")
+    else:
+        st.session_state.index_results.clear()
+        with st.spinner(text="Searching resume index..."):
+            for jd_name, jd_text in parse_job_descriptions(selected_jd_names).items():
+                hits = get_resume_index().search(
+                    jd_text,
+                    st.session_state.aws_access_key, st.session_state.aws_secret_key,
+                    st.session_state.aws_region, k=index_top_k
+                )
+                st.session_state.index_results[jd_name] = dataframe([
+                    {"Resume": hit["resume"], "Resume Match (%)": hit["score"], "Skills": ", ".join(hit["skills"])}
+                    for hit in hits
+                ])
+
+for jd_name, hits_df in st.session_state.index_results.items():
+    st.subheader(f"🗂️ Top {len(hits_df)} indexed candidates for JD: {jd_name}")
+    st.dataframe(hits_df)
+
+def show_run_metrics(summary, prometheus_text, tokens):
+    """Where the time went on the last run: stages, per-document latency, Bedrock calls, tokens and cache."""
+    with st.expander(f"⏱️ Run Metrics ({summary['duration']:.1f}s)"):
+        st.write("**Stage timings (s)**")
+        st.dataframe(dataframe([{"Stage": stage, "Seconds": seconds}
+                                   for stage, seconds in summary["stages"].items()]))
+        if summary["documents"]:
+            st.write("**Per-document latency (s)**")
+            st.dataframe(dataframe([dict(Stage=stage, **stats) for stage, stats in summary["documents"].items()]))
+        if summary["bedrock"]:
+            st.write("**Bedrock calls**")
+            st.dataframe(dataframe([
+                {
+                    "Model": model,
+                    "Calls": stats.get("calls", 0),
+                    "Retries": stats.get("retries", 0),
+                    "Throttles": stats.get("throttles", 0),
+                    "Errors": stats.get("errors", 0),
+                    "Input Tokens": stats.get("input_tokens", 0),
+                    "Output Tokens": stats.get("output_tokens", 0),
+                    "p95 Latency (s)": stats.get("latency", {}).get("p95"),
                 }
+                for model, stats in summary["bedrock"].items()
+            ]))
+        if tokens:
+            total = summary["tokens"]
+            st.write(f"**Preprocessing** — ~{total['tokens_saved']} of {2 * total['original_tokens']} "
+                     f"estimated model input tokens saved")
+            st.dataframe(dataframe(tokens, columns=TOKEN_REPORT_COLUMNS))
+        if summary["cache"]:
+            st.write("**Cache**")
+            st.dataframe(dataframe([dict(Namespace=namespace, **stats)
+                                       for namespace, stats in summary["cache"].items()]))
+        st.download_button("Download metrics (JSON)", data=json.dumps(summary, indent=2),
+                           file_name="metrics.json", mime="application/json", key="metrics_json")
+        st.download_button("Download metrics (Prometheus)", data=prometheus_text,
+                           file_name="metrics.prom", mime="text/plain", key="metrics_prom")
+
+
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "🚫"}
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_jobs():
+    """This session's background jobs, refreshed every JOB_POLL_INTERVAL seconds."""
+    pool = get_job_pool()
+    jobs = pool.queue.list_jobs(owner)
+    if not jobs:
+        return
+    st.subheader("🧵 Background Jobs")
+    for job in jobs:
+        started = time.strftime("%H:%M:%S", time.localtime(job["created_at"]))
+        label = f"{JOB_STATUS_ICONS[job['status']]} Job {job['id']} · {job['status']} · submitted {started}"
+        info, actions = st.columns([4, 1])
+        with info:
+            if job["status"] == "running" and job["total"]:
+                st.progress(job["done"] / job["total"], text=f"{label} · {job['done']}/{job['total']} resumes")
+            else:
+                st.write(label)
+            if job["error"]:
+                st.caption(job["error"])
+        with actions:
+            if job["status"] in ("queued", "running"):
+                if st.button("Cancel", key=f"cancel_{job['id']}"):
+                    pool.queue.cancel(job["id"])
+                    st.rerun(scope="fragment")
+            else:
+                if job["status"] == "done" and st.button("Show results", key=f"load_{job['id']}"):
+                    run = load_job_results(job["id"])
+                    show_results(run, job["id"], run["selected_folder"], run["results_folder"], run["metrics"],
+                                 run["metrics_prometheus"])
+                    st.rerun()
+                if st.button("Delete", key=f"delete_{job['id']}"):
+                    delete_job(pool.queue, job["id"])
+                    st.rerun(scope="fragment")
+
+
+show_jobs()
+
+SORT_OPTIONS = {RESULT_COLUMNS[field]: field for field in SORTABLE_FIELDS}
+
+
+@st.fragment
+def show_report(jd_name):
+    """
+    One page of a JD's report, filtered and sorted by the result store. Changing the
+    filters or the page reruns only this report.
+    """
+    store = ResultStore(st.session_state.results_folder)
+    key = f"{st.session_state.run_id}_{jd_name}"
+    st.subheader(f"📊 Matching Report for JD: {jd_name}")
+    search_col, score_col, sort_col, order_col = st.columns([3, 2, 2, 1])
+    search = search_col.text_input("Search resume or skill", key=f"search_{key}")
+    min_score = score_col.number_input("Min Resume Match (%)", min_value=0, max_value=100, value=None,
+                                       placeholder="Any", key=f"min_score_{key}")
+    sort_label = sort_col.selectbox("Sort by", list(SORT_OPTIONS), key=f"sort_{key}")
+    descending = order_col.checkbox("Desc", value=True, key=f"desc_{key}")
+
+    page = st.session_state.get(f"page_{key}", 1)
+    rows, total = store.query(jd_name, search, min_score, SORT_OPTIONS[sort_label], descending, page - 1)
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    if page > pages:
+        # The filters now match fewer pages than the one shown.
+        page = st.session_state[f"page_{key}"] = pages
+        rows, total = store.query(jd_name, search, min_score, SORT_OPTIONS[sort_label], descending, page - 1)
+    st.dataframe(dataframe(rows, columns=REPORT_COLUMNS))
+    page_col, count_col = st.columns([1, 3])
+    page_col.number_input("Page", min_value=1, max_value=pages, key=f"page_{key}")
+    count_col.caption(f"{total} of {store.count(jd_name)} resumes match · page {page} of {pages}")
+
+    csv_col, parquet_col = st.columns(2)
+    # Full reports are written from the store on the first click, not rebuilt on every rerun.
+    csv_col.download_button(
+        f"Download CSV for {jd_name}",
+        data=partial(read_export, st.session_state.results_folder, jd_name, "csv"),
+        file_name=f"{jd_name}_report.csv",
+        mime="text/csv",
+        key=f"csv_{jd_name}"
+    )
+    parquet_col.download_button(
+        f"Download Parquet for {jd_name}",
+        data=partial(read_export, st.session_state.results_folder, jd_name, "parquet"),
+        file_name=f"{jd_name}_report.parquet",
+        mime="application/vnd.apache.parquet",
+        key=f"parquet_{jd_name}"
+    )
 
-                for jd_path in jd_paths:
-                    jd_text = extract_text_from_file(jd_path)
-                    results = generate_match_report(
-                        resume_texts,
-                        jd_text,
-                        aws_access_key=st.session_state.aws_access_key,
-                        aws_secret_key=st.session_state.aws_secret_key,
-                        aws_region=st.session_state.aws_region
-                    )
-
-                    selected_resumes = []
-                    detailed_data = []
-
-                    for result in results:
-                        if result["embedding_score"] >= min_match_score:
-                            selected_resumes.append(result["resume"])
-                            src_path = os.path.join(RESUME_UPLOAD_FOLDER, result["resume"])
-                            dst_path = os.path.join(SELECTED_PROFILE_FOLDER, result["resume"])
-                            if os.path.exists(src_path):
-                                with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
-                                    dst.write(src.read())
-
-                        detailed_data.append({
-                            "Resume": result["resume"],
-                            "Skills Match (%)": result["match_score"],
-                            "Resume Match (%)": result["embedding_score"],
-                            "All Resume Skills": ", ".join(sorted(result["all_resume_skills"])),
-                            "Matching Skills with JD": ", ".join(sorted(result["matched_skills"])),
-                            "Missing Skills from JD": ", ".join(sorted(result["missing_skills"]))
-                        })
-
-                    jd_name = os.path.splitext(os.path.basename(jd_path))[0].replace(" ", "_")
-                    st.session_state.match_reports[jd_name] = pd.DataFrame(detailed_data)
-                    st.session_state.selected_profiles[jd_name] = selected_resumes
-                    st.session_state.processed = True
 
 # Display Results
+if st.session_state.processed and st.session_state.run_metrics:
+    show_run_metrics(st.session_state.run_metrics, st.session_state.run_metrics_prom, st.session_state.run_tokens)
+
 if st.session_state.processed:
-    for jd_name, match_df in st.session_state.match_reports.items():
-        st.subheader(f"📊 Matching Report for JD: {jd_name}")
-        st.dataframe(match_df)
+    for jd_name in st.session_state.report_jds:
+        show_report(jd_name)
 
         selected = st.session_state.selected_profiles.get(jd_name, [])
         if selected:
@@ -180,26 +545,12 @@ if st.session_state.processed:
         else:
             st.warning(f"⚠️ No resumes matched the minimum score for JD '{jd_name}'.")
 
-        st.download_button(
-            f"Download CSV for {jd_name}",
-            data=match_df.to_csv(index=False).encode("utf-8"),
-            file_name=f"{jd_name}_report.csv",
-            mime="text/csv",
-            key=f"csv_{jd_name}"
-        )
-
         if selected:
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for filename in selected:
-                    filepath = os.path.join(SELECTED_PROFILE_FOLDER, filename)
-                    if os.path.exists(filepath):
-                        with open(filepath, "rb") as f:
-                            zipf.writestr(filename, f.read())
-            zip_buffer.seek(0)
+            # Built on the first click of this run's button and reused, not on every rerun.
             st.download_button(
                 label=f"Download Matched Resumes (ZIP) for {jd_name}",
-                data=zip_buffer,
+                data=partial(read_archive, st.session_state.selected_folder, jd_name, selected,
+                             st.session_state.run_id),
                 file_name=f"{jd_name}_selected_resumes.zip",
                 mime="application/zip",
                 key=f"zip_{jd_name}"